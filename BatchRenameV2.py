@@ -1,12 +1,177 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QListWidget, QLineEdit, QPushButton, QVBoxLayout, \
-    QWidget, QHBoxLayout, QLabel
+import time
+from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QListView, QLineEdit, QPushButton, QVBoxLayout, \
+    QWidget, QHBoxLayout, QLabel, QMessageBox, QProgressBar, QCheckBox, QComboBox
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QThread, QTimer, QFileSystemWatcher, pyqtSignal
 from PyQt5 import QtGui  # Import QtGui module
 
+from rename_engine import scan_images, build_renames, plan_folder, RenameConflictError, RenameJournal, execute_plan, \
+    resume, undo, pending_journal, undoable_journal, plan_tree, execute_tree, undo_tree, DEFAULT_TEMPLATE, IMAGE_EXTENSIONS
+from image_sequences import NATURAL, FRAME, CAPTURE, HeaderCache, find_sequences
+
 
 # List of allowed image file extensions
-ALLOWED_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp','.exr','.tga','.svg','.psd','.ai','.pic','.rat']
+ALLOWED_IMAGE_EXTENSIONS = IMAGE_EXTENSIONS
+
+class ImageListModel(QAbstractListModel):
+    # Holds only the image file names; the view asks for the rows it draws
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.revision = 0  # Bumped on every change so background diffs can tell they are stale
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.names[index.row()]
+        return None
+
+    def clear(self):
+        self.beginResetModel()
+        self.names = []
+        self.revision += 1
+        self.endResetModel()
+
+    def append_names(self, names):
+        if not names:
+            return
+        self.revision += 1
+        first = len(self.names)
+        self.beginInsertRows(QModelIndex(), first, first + len(names) - 1)
+        self.names.extend(names)
+        self.endInsertRows()
+
+    def apply_renames(self, renames):
+        # Updates rows in place from executed (old, new) pairs. Returns False when an
+        # old name is not in the list, in which case the caller should rescan.
+        rows = {name: row for row, name in enumerate(self.names)}
+        # Look every row up before writing any, so swaps like a <-> b land correctly
+        try:
+            updates = [(rows[old], new) for old, new in renames]
+        except KeyError:
+            return False
+        for row, new in updates:
+            self.names[row] = new
+        self.revision += 1
+        if updates:
+            changed = [row for row, _ in updates]
+            self.dataChanged.emit(self.index(min(changed)), self.index(max(changed)), [Qt.DisplayRole])
+        return True
+
+    def remove_names(self, names):
+        names = set(names)
+        rows = [row for row, name in enumerate(self.names) if name in names]
+        if not rows:
+            return
+        self.revision += 1
+
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        if len(runs) > 100:
+            # Scattered removals are cheaper as one reset than as many row signals
+            self.beginResetModel()
+            self.names = [name for name in self.names if name not in names]
+            self.endResetModel()
+            return
+        # Bottom-up so the row numbers of earlier runs stay valid
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.names[first:last + 1]
+            self.endRemoveRows()
+
+
+class FolderScanner(QThread):
+    # Reads the folder off the GUI thread and hands image names over in chunks
+    chunk_found = pyqtSignal(int, list)
+    scan_finished = pyqtSignal(int, str, int)  # generation, error, sequences found
+
+    def __init__(self, folder, generation, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.generation = generation
+
+    def run(self):
+        error = ""
+        names = []
+        try:
+            for chunk in scan_images(self.folder, ALLOWED_IMAGE_EXTENSIONS):
+                if self.isInterruptionRequested():
+                    return
+                names.extend(chunk)
+                self.chunk_found.emit(self.generation, chunk)
+        except OSError as e:
+            error = str(e)
+        # Sequences are counted here: on a big folder it takes most of a second
+        sequences = 0 if error else len(find_sequences(names)[0])
+        self.scan_finished.emit(self.generation, error, sequences)
+
+
+class FolderDiffer(QThread):
+    # Re-reads the folder off the GUI thread and reports which names appeared or vanished
+    diff_ready = pyqtSignal(int, list, list)
+
+    def __init__(self, folder, known_names, revision, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.known_names = known_names
+        self.revision = revision
+
+    def run(self):
+        try:
+            current = [name for chunk in scan_images(self.folder, ALLOWED_IMAGE_EXTENSIONS) for name in chunk]
+        except OSError:
+            return
+        known = set(self.known_names)
+        current_set = set(current)
+        added = [name for name in current if name not in known]
+        removed = [name for name in self.known_names if name not in current_set]
+        self.diff_ready.emit(self.revision, added, removed)
+
+
+class RenameWorker(QThread):
+    # Runs a rename task off the GUI thread. The task is called as
+    # task(progress, should_stop) and returns either the (old, new) renames it
+    # performed or, for a recursive run, the report from execute_tree.
+    progress_changed = pyqtSignal(int)
+    task_finished = pyqtSignal(object, str)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.done = 0
+
+    def run(self):
+        performed = []
+        error = ""
+        last_emit = time.monotonic()
+
+        def progress(old, new):
+            nonlocal last_emit
+            self.done += 1
+            # Batch the updates so a big folder does not flood the GUI thread with signals
+            if time.monotonic() - last_emit >= 0.1:
+                last_emit = time.monotonic()
+                self.progress_changed.emit(self.done)
+
+        try:
+            performed = self.task(progress, self.isInterruptionRequested)
+        except RenameConflictError as e:
+            error = "\n".join(e.conflicts[:20])
+        except OSError as e:
+            error = str(e)
+        except Exception as e:
+            # Anything else still has to reach rename_finished, or the buttons stay disabled
+            error = f"{type(e).__name__}: {e}"
+        self.progress_changed.emit(self.done)
+        self.task_finished.emit(performed, error)
+
 
 class BatchRenameTool(QMainWindow):
     def __init__(self):
@@ -22,7 +187,7 @@ class BatchRenameTool(QMainWindow):
         # Dark Theme Styling
         self.setStyleSheet(
             "QMainWindow {background-color: #2E2E2E; color: #FFFFFF; font-size: 24px;}"
-            "QListWidget {background-color: #424242; border: none; color: #FFFFFF; font-size: 18px;}"
+            "QListView {background-color: #424242; border: none; color: #FFFFFF; font-size: 18px;}"
             "QLineEdit {background-color: #363636; color: #FFFFFF; border: 1px solid #6E6E6E; font-size: 24px;}"
             "QPushButton {background-color: #007ACC; color: #FFFFFF; border: none; padding: 10px 20px; font-size: 24px;}"
             "QPushButton:hover {background-color: #0064A2;}"
@@ -33,9 +198,31 @@ class BatchRenameTool(QMainWindow):
         layout = QVBoxLayout()
 
         # File List
-        self.file_list = QListWidget()
+        self.file_model = ImageListModel(self)
+        self.file_list = QListView()
+        self.file_list.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.file_list.setModel(self.file_model)
         layout.addWidget(self.file_list)
 
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+        self.scanner = None
+        self.scan_generation = 0
+        self.rename_worker = None
+        self.header_cache = HeaderCache()  # capture times, reused when a folder is renamed again
+
+        # Live mode: directory change events are coalesced into one background diff
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.folder_changed)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_folder)
+        self.first_change = None
+        self.differ = None
+
         # Directory Label and Input Field
         directory_layout = QHBoxLayout()
         self.directory_input = QLineEdit()
@@ -43,34 +230,58 @@ class BatchRenameTool(QMainWindow):
         directory_layout.addWidget(self.directory_input)
         self.select_folder_button = QPushButton("Select Folder")
         directory_layout.addWidget(self.select_folder_button)
+        self.live_checkbox = QCheckBox("Live Update")
+        self.live_checkbox.setStyleSheet("color: #FFFFFF; font-size: 20px;")
+        directory_layout.addWidget(self.live_checkbox)
         layout.addLayout(directory_layout)
 
         # Input Fields
         input_layout = QHBoxLayout()
-        name_input = QLineEdit()
-        name_input.setObjectName('new_name')
-        name_input.setPlaceholderText("New Name")
-        suffix_input = QLineEdit()
-        suffix_input.setObjectName('suffix')
-        suffix_input.setPlaceholderText("Suffix")
-        padding_input = QLineEdit()
-        padding_input.setPlaceholderText("0-6")
-        padding_input.setValidator(QtGui.QIntValidator(0, 6))  # Allow only numbers from 0 to 6
-        padding_input.setText("4")  # Default padding value
-        input_layout.addWidget(name_input)
-        input_layout.addWidget(suffix_input)
-        input_layout.addWidget(padding_input)  # Add the padding input field
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("New Name")
+        self.suffix_input = QLineEdit()
+        self.suffix_input.setPlaceholderText("Suffix")
+        self.padding_input = QLineEdit()
+        self.padding_input.setPlaceholderText("0-6")
+        self.padding_input.setValidator(QtGui.QIntValidator(0, 6))  # Allow only numbers from 0 to 6
+        self.padding_input.setText("4")  # Default padding value
+        input_layout.addWidget(self.name_input)
+        input_layout.addWidget(self.suffix_input)
+        input_layout.addWidget(self.padding_input)  # Add the padding input field
         layout.addLayout(input_layout)
 
+        # Naming template and recursive mode
+        template_layout = QHBoxLayout()
+        self.template_input = QLineEdit()
+        self.template_input.setPlaceholderText(DEFAULT_TEMPLATE + "   tokens: {folder} {new_name} {suffix} {index} {ext}")
+        template_layout.addWidget(self.template_input)
+        self.order_input = QComboBox()
+        self.order_input.addItem("Natural Order", NATURAL)
+        self.order_input.addItem("Frame Number", FRAME)
+        self.order_input.addItem("Capture Time", CAPTURE)
+        template_layout.addWidget(self.order_input)
+        self.recursive_checkbox = QCheckBox("Include Subfolders")
+        self.recursive_checkbox.setStyleSheet("color: #FFFFFF; font-size: 20px;")
+        template_layout.addWidget(self.recursive_checkbox)
+        layout.addLayout(template_layout)
+
         # Buttons
         button_layout = QHBoxLayout()
-        rename_button = QPushButton("Rename")
-        button_layout.addWidget(rename_button)
+        self.rename_button = QPushButton("Rename")
+        button_layout.addWidget(self.rename_button)
+        self.undo_button = QPushButton("Undo Last Rename")
+        button_layout.addWidget(self.undo_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
         layout.addLayout(button_layout)
 
         # Connect Buttons to Functions
         self.select_folder_button.clicked.connect(self.select_folder)
-        rename_button.clicked.connect(self.rename_files)
+        self.rename_button.clicked.connect(self.rename_files)
+        self.undo_button.clicked.connect(self.undo_rename)
+        self.cancel_button.clicked.connect(self.cancel_rename)
+        self.live_checkbox.toggled.connect(self.update_watcher)
 
         central_widget.setLayout(layout)
 
@@ -83,30 +294,252 @@ class BatchRenameTool(QMainWindow):
 
             self.folder = folder
             self.directory_input.setText(folder)  # Update the QLineEdit with the selected folder path
-            self.load_files()
+            # A recovery runs on the worker; the folder is scanned when it finishes
+            if not self.recover_interrupted_rename():
+                self.load_files()
+            self.update_watcher()
+
+    def update_watcher(self):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        if self.live_checkbox.isChecked() and hasattr(self, 'folder'):
+            self.watcher.addPath(self.folder)
+
+    def folder_changed(self, path):
+        # Wait for a quiet moment before refreshing, but never more than a second
+        # after the first event, so a steady stream of new frames still shows up
+        now = time.monotonic()
+        if self.first_change is None:
+            self.first_change = now
+        if now - self.first_change < 1.0:
+            self.refresh_timer.start(250)
+        elif not self.refresh_timer.isActive():
+            self.refresh_timer.start(0)
+
+    def refresh_folder(self):
+        if not hasattr(self, 'folder') or not self.live_checkbox.isChecked():
+            self.first_change = None
+            return
+        if self.scanner is not None or self.rename_worker is not None or self.differ is not None:
+            # Something else is updating the list; look again once it is done
+            self.refresh_timer.start(250)
+            return
+        self.first_change = None
+        self.differ = FolderDiffer(self.folder, list(self.file_model.names), self.file_model.revision, self)
+        self.differ.diff_ready.connect(self.apply_folder_diff)
+        self.differ.finished.connect(self.differ_finished)
+        self.differ.start()
+
+    def differ_finished(self):
+        self.differ.deleteLater()
+        self.differ = None
+
+    def apply_folder_diff(self, revision, added, removed):
+        if revision != self.file_model.revision:
+            # The list changed while the diff ran; it no longer applies
+            self.refresh_timer.start(250)
+            return
+        self.file_model.remove_names(removed)
+        self.file_model.append_names(added)
+        if added or removed:
+            self.status_label.setText(f"{len(self.file_model.names):,} images (+{len(added):,} / -{len(removed):,})")
+
+    def recover_interrupted_rename(self):
+        # A journal without an end marker means the last batch stopped halfway.
+        # Returns True when a resume or undo was started.
+        journal = pending_journal(self.folder)
+        if journal is None:
+            return False
+        response = QMessageBox.question(
+            self, "Unfinished Rename",
+            "A previous rename in this folder did not finish.\n\n"
+            "Yes: finish it\nNo: undo the part that ran\nCancel: leave the folder as it is",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+        if response not in (QMessageBox.Yes, QMessageBox.No):
+            return False
+        # The list still shows the previous folder; rename_finished rescans an empty list
+        self.stop_scanner()
+        self.file_model.clear()
+        plan, done, _ = journal.read()
+        if response == QMessageBox.Yes:
+            self.run_rename_task(lambda progress, should_stop: resume(journal, progress, should_stop),
+                                 len(plan) - len(done))
+        else:
+            self.run_rename_task(lambda progress, should_stop: undo(journal, progress), len(done),
+                                 cancellable=False)
+        return True
 
     def load_files(self):
-        self.file_list.clear()
+        self.stop_scanner()
+        self.file_model.clear()
         if hasattr(self, 'folder'):
-            files = os.listdir(self.folder)
-            self.file_list.addItems(files)
-            image_files = [file for file in files if os.path.splitext(file)[-1].lower() in ALLOWED_IMAGE_EXTENSIONS]
+            # Chunks from an older scan are ignored by comparing generations
+            self.scan_generation += 1
+            self.scanner = FolderScanner(self.folder, self.scan_generation, self)
+            self.scanner.chunk_found.connect(self.add_scanned_files)
+            self.scanner.scan_finished.connect(self.scan_done)
+            self.rename_button.setEnabled(False)
+            self.status_label.setText("Scanning...")
+            self.scanner.start()
+
+    def stop_scanner(self):
+        if self.differ is not None:
+            self.differ.wait()
+        if self.scanner is not None:
+            self.scanner.requestInterruption()
+            self.scanner.wait()
+            self.scanner.deleteLater()
+            self.scanner = None
+
+    def add_scanned_files(self, generation, names):
+        if generation != self.scan_generation:
+            return
+        self.file_model.append_names(names)
+        self.status_label.setText(f"Scanning... {len(self.file_model.names):,} images")
+
+    def scan_done(self, generation, error, sequences):
+        if generation != self.scan_generation:
+            return
+        self.scanner.wait()  # run() is returning; make sure it has before deleting the thread
+        self.scanner.deleteLater()
+        self.scanner = None
+        self.rename_button.setEnabled(True)
+        if error:
+            self.status_label.setText(f"Could not read folder: {error}")
+        else:
+            self.status_label.setText(f"{len(self.file_model.names):,} images"
+                                      + (f", {sequences:,} sequences" if sequences else ""))
+
+    def closeEvent(self, event):
+        self.stop_scanner()
+        if self.rename_worker is not None:
+            # Let the current group of renames finish so no file is left on a temporary name
+            self.rename_worker.requestInterruption()
+            self.rename_worker.wait()
+        super().closeEvent(event)
+
+    def run_rename_task(self, task, total, cancellable=True):
+        self.rename_worker = RenameWorker(task, self)
+        self.rename_worker.progress_changed.connect(self.rename_progress)
+        self.rename_worker.task_finished.connect(self.rename_finished)
+        for button in (self.rename_button, self.undo_button, self.select_folder_button):
+            button.setEnabled(False)
+        self.cancel_button.setEnabled(cancellable)
+        self.progress_bar.setRange(0, total)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.rename_worker.start()
+
+    def rename_progress(self, done):
+        self.progress_bar.setValue(done)
+        if self.progress_bar.maximum() == 0:
+            self.status_label.setText(f"{done:,} files renamed...")
+
+    def cancel_rename(self):
+        if self.rename_worker is not None:
+            self.rename_worker.requestInterruption()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText("Cancelling after the current file...")
+
+    def rename_finished(self, result, error):
+        cancelled = self.rename_worker.isInterruptionRequested()
+        self.rename_worker.deleteLater()
+        self.rename_worker = None
+        self.progress_bar.hide()
+        for button in (self.rename_button, self.undo_button, self.select_folder_button):
+            button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+        if isinstance(result, dict) and 'restored' in result:
+            self.show_undo_report(result)
+            result = result['restored'].get(self.folder, [])
+        elif isinstance(result, dict):
+            self.show_tree_report(result, cancelled)
+            result = result['renamed'].get(self.folder, [])
+
+        # Update the list from what actually happened instead of re-reading the folder
+        performed = result or []
+        if not self.file_model.names or not self.file_model.apply_renames(performed):
+            self.load_files()
+        else:
+            self.status_label.setText(f"{len(self.file_model.names):,} images, {len(performed):,} renamed"
+                                      + (" (cancelled)" if cancelled else ""))
+        if error and pending_journal(self.folder) is None:
+            # Nothing ran: planning found conflicts
+            QMessageBox.warning(self, "Rename Conflicts", error)
+        elif error:
+            QMessageBox.warning(self, "Rename Failed", f"{error}\n\nReopen the folder to finish or undo the rename.")
+
+    def show_tree_report(self, report, cancelled):
+        lines = [f"Renamed {report['files_renamed']:,} of {report['files_planned']:,} files "
+                 f"in {report['folders']:,} folders" + (" (cancelled)" if cancelled else "") + ".",
+                 f"Planning took {report['plan_seconds']:.1f}s, renaming {report['execute_seconds']:.1f}s."]
+        if report['conflict_folders']:
+            lines.append(f"\n{report['conflict_folders']:,} folders were skipped because of conflicts:")
+            for folder, conflicts in list(report['conflicts'].items())[:10]:
+                lines.append(f"{os.path.relpath(folder, report['root'])}: {conflicts[0]}")
+        for folder, error in list(report['errors'].items())[:10]:
+            lines.append(f"{os.path.relpath(folder, report['root'])}: {error}")
+        QMessageBox.information(self, "Recursive Rename", "\n".join(lines))
+
+    def show_undo_report(self, report):
+        lines = [f"Restored {report['files_restored']:,} files in {report['folders']:,} folders "
+                 f"in {report['undo_seconds']:.1f}s."]
+        for folder, error in list(report['errors'].items())[:10]:
+            lines.append(f"{os.path.relpath(folder, report['root'])}: {error}")
+        QMessageBox.information(self, "Recursive Undo", "\n".join(lines))
 
     def rename_files(self):
-        if hasattr(self, 'folder'):
-            new_name = self.findChild(QLineEdit, 'new_name').text()
-            suffix = self.findChild(QLineEdit, 'suffix').text()
-            padding = int(self.padding_input.text())  # Get the padding value from the input field
-            current_index = 0  # Initialize the index to 0
-        for index in range(self.file_list.count()):
-            current_index += 1  # Increment the index
-            old_file_name = os.path.join(self.folder, self.file_list.item(index).text())
-            file_extension = os.path.splitext(old_file_name)[-1].lower()
-            if file_extension in ALLOWED_IMAGE_EXTENSIONS:
-                new_file_name = os.path.join(self.folder,
-                                             f"{new_name}_{suffix}_{index + 1:0{padding}d}{file_extension}")  # Use padding
-                os.rename(old_file_name, new_file_name)
-        self.load_files()
+        if not hasattr(self, 'folder'):
+            return
+        new_name = self.name_input.text()
+        suffix = self.suffix_input.text()
+        padding = int(self.padding_input.text() or 0)  # Get the padding value from the input field
+        template = self.template_input.text() or DEFAULT_TEMPLATE
+        order = self.order_input.currentData()
+        folder = self.folder
+        try:
+            build_renames(['check.png'], new_name, suffix, padding, template)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Template", str(e))
+            return
+
+        if self.recursive_checkbox.isChecked():
+            # Every folder is planned first, then the folders are renamed in parallel
+            def rename_tree(progress, should_stop):
+                tree = plan_tree(folder, new_name, suffix, padding, template, ALLOWED_IMAGE_EXTENSIONS,
+                                 order, self.header_cache)
+                return execute_tree(tree, workers=4, progress=progress, should_stop=should_stop)
+            self.run_rename_task(rename_tree, 0)
+            return
+
+        # Ordering can read every file's header, so it runs on the worker too. Every
+        # old -> new name is worked out before anything moves.
+        names = list(self.file_model.names)
+
+        def rename_folder(progress, should_stop):
+            plan = plan_folder(folder, names, new_name, suffix, padding, template, order, self.header_cache)
+            journal = RenameJournal.for_folder(folder)
+            journal.start(plan)
+            return execute_plan(plan, journal, progress=progress, should_stop=should_stop)
+        self.run_rename_task(rename_folder, len(names))
+
+    def undo_rename(self):
+        if not hasattr(self, 'folder'):
+            return
+        if self.recursive_checkbox.isChecked():
+            # A recursive run journaled every folder it renamed; each one is undone
+            folder = self.folder
+            self.run_rename_task(lambda progress, should_stop: undo_tree(folder, progress=progress), 0,
+                                 cancellable=False)
+            return
+        journal = undoable_journal(self.folder)
+        if journal is None:
+            QMessageBox.information(self, "Undo", "There is no rename to undo in this folder.")
+            return
+        # Undo always runs to the end so the folder returns to one consistent state
+        self.run_rename_task(lambda progress, should_stop: undo(journal, progress), len(journal.read()[1]),
+                             cancellable=False)
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -1,90 +1,80 @@
 # Convert FBX to images using blender
 import os
-import subprocess
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
-def find_fbx_files(directory):
-    fbx_files = []
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.endswith(".fbx"):
-                fbx_files.append(os.path.join(root, file))
-    return fbx_files
-
-
-def render_fbx_to_png(fbx_file, output_dir, blender_path):
-    blender_script = f"""
-import bpy
-from mathutils import Vector
-
-# Delete default objects
-bpy.ops.object.select_all(action='SELECT')
-bpy.ops.object.delete()
-
-# Load the FBX file
-bpy.ops.import_scene.fbx(filepath=r'{fbx_file}')
-
-# Add 3-point lighting
-def add_light(name, location, energy):
-    bpy.ops.object.light_add(type='POINT', location=location)
-    light = bpy.context.object
-    light.data.energy = energy
-    light.name = name
-
-add_light('Key Light', (3, -3, 3), 1000)
-add_light('Fill Light', (-3, -3, 3), 500)
-add_light('Back Light', (0, 3, 3), 750)
-
-# Find the bounding box of the imported object
-imported_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
-if imported_objects:
-    # Assume first object is the target
-    target_obj = imported_objects[0]
-    bpy.context.view_layer.objects.active = target_obj
-    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
-
-    # Calculate the dimensions and position the camera
-    dims = target_obj.dimensions
-    max_dim = max(dims)
-    target_obj.location = (0, 0, 0)
-
-    # Create and position camera
-    camera_distance = max_dim * 1.5
-    bpy.ops.object.camera_add(location=(camera_distance, camera_distance, camera_distance))
-    camera = bpy.context.object
-    camera.data.type = 'PERSP'
-    camera.data.lens = 50  # Standard lens focal length
-
-    # Point the camera to the object
-    direction = (Vector(target_obj.location) - camera.location).normalized()
-    rot_quat = direction.to_track_quat('-Z', 'Y')
-    camera.rotation_euler = rot_quat.to_euler()
-
-    # Set the camera as the active camera
-    bpy.context.scene.camera = camera
-
-# Render settings
-bpy.context.scene.render.image_settings.file_format = 'PNG'
-bpy.context.scene.render.resolution_x = 600
-bpy.context.scene.render.resolution_y = 600
-
-# Output path
-output_file = r'{os.path.join(output_dir, os.path.basename(fbx_file).replace('.fbx', '.png'))}'
-
-# Render the scene
-bpy.ops.render.render(write_still=True)
-bpy.data.images['Render Result'].save_render(filepath=output_file)
-"""
-
-    subprocess.run([blender_path, '--background', '--python-expr', blender_script])
+from fbx_render import (iter_fbx_files, turntable_views, multi_view_settings, RenderPool,
+                        DONE, FAILED, TIMEOUT, CANCELLED, SKIPPED)
+
+render_pool = None
 
 
 def start_rendering():
-    fbx_files = find_fbx_files(fbx_dir.get())
-    for fbx_file in fbx_files:
-        render_fbx_to_png(fbx_file, output_dir.get(), blender_path.get())
-    messagebox.showinfo("Rendering Complete", "All files have been rendered.")
+    global render_pool
+    if render_pool is not None and not render_pool.finished.is_set():
+        return
+
+    try:
+        workers = int(worker_count.get())
+        files_per_process = int(files_per_blender.get())
+        timeout = float(timeout_seconds.get()) if timeout_seconds.get().strip() else None
+        max_depth = int(depth_limit.get()) if depth_limit.get().strip() else None
+        views = int(view_count.get())
+        columns = int(atlas_columns.get()) if atlas_columns.get().strip() else 0
+    except ValueError:
+        messagebox.showerror("Invalid Settings", "Workers, files per Blender, timeout, depth, views and "
+                                                 "atlas columns must be numbers.")
+        return
+
+    try:
+        os.makedirs(output_dir.get(), exist_ok=True)
+    except OSError as e:
+        messagebox.showerror("Invalid Output Directory", str(e))
+        return
+
+    # One view keeps the classic three-quarter thumbnail; more views render a turntable atlas
+    settings = multi_view_settings(turntable_views(views), columns) if views > 1 else None
+
+    render_pool = RenderPool(blender_path.get(), output_dir.get(), workers=workers, timeout=timeout,
+                             files_per_process=files_per_process, settings=settings, force=force_rebuild.get())
+    # Discovery runs on the pool's feeder thread and files start rendering as they are found
+    render_pool.start(iter_fbx_files(fbx_dir.get(), split_patterns(include_globs.get()),
+                                     split_patterns(exclude_globs.get()), max_depth))
+    progress_text.set("Rendering...")
+    root.after(200, poll_rendering, render_pool)
+
+
+def split_patterns(text):
+    return [pattern.strip() for pattern in text.split(',') if pattern.strip()]
+
+
+def poll_rendering(pool):
+    counts = pool.snapshot()
+    scanning = " (scanning...)" if pool.discovering else ""
+    progress_text.set(f"Discovered {pool.discovered}{scanning} | queued {pool.waiting} | "
+                      f"done {sum(counts.values())}\n"
+                      f"Rendered {counts[DONE]} | up to date {counts[SKIPPED]} | failed {counts[FAILED]} | "
+                      f"timed out {counts[TIMEOUT]} | cancelled {counts[CANCELLED]}")
+    if not pool.finished.is_set():
+        root.after(200, poll_rendering, pool)
+        return
+
+    if pool.cancelled:
+        messagebox.showinfo("Rendering Cancelled", f"{counts[DONE]} files were rendered before cancelling.")
+    elif counts[FAILED] or counts[TIMEOUT]:
+        failures = "\n".join(os.path.basename(f) for f in list(pool.errors)[:10])
+        messagebox.showwarning("Rendering Complete",
+                               f"{counts[DONE]} files rendered, {counts[FAILED]} failed, "
+                               f"{counts[TIMEOUT]} timed out.\n\n{failures}")
+    else:
+        messagebox.showinfo("Rendering Complete", f"All files have been rendered "
+                                                  f"({counts[SKIPPED]} were already up to date).")
+
+
+def cancel_rendering():
+    if render_pool is not None and not render_pool.finished.is_set():
+        render_pool.cancel()
+        progress_text.set("Cancelling...")
 
 def select_directory(entry):
     directory = filedialog.askdirectory()
@@ -94,35 +84,86 @@ def select_file(entry):
     file_path = filedialog.askopenfilename()
     entry.set(file_path)
 
-root = tk.Tk()
-root.title("FBX to PNG")
-root.geometry("600x370")
-
-# Dark theme colors
-dark_color = "#333333"
-light_color = "#eeeeee"
-
-# Set the color scheme
-root.configure(bg=dark_color)
-style = {"bg": dark_color, "fg": light_color}
-
-# Define the StringVar objects
-fbx_dir = tk.StringVar()
-output_dir = tk.StringVar()
-blender_path = tk.StringVar()
-
-tk.Label(root, text="FBX Directory:", **style, padx=30,pady=10).pack()
-tk.Entry(root, textvariable=fbx_dir, bg=light_color, fg=dark_color, width=95).pack()
-tk.Button(root, text="Browse", command=lambda: select_directory(fbx_dir), **style, padx=30,pady=10).pack()
-
-tk.Label(root, text="Output Directory:", **style, padx=30,pady=10).pack()
-tk.Entry(root, textvariable=output_dir, bg=light_color, fg=dark_color, width=95).pack()
-tk.Button(root, text="Browse", command=lambda: select_directory(output_dir), **style, padx=30,pady=10).pack()
-
-tk.Label(root, text="Blender Executable:", **style, padx=30,pady=10).pack()
-tk.Entry(root, textvariable=blender_path, bg=light_color, fg=dark_color, width=95).pack()
-tk.Button(root, text="Browse", command=lambda: select_file(blender_path), **style, padx=30,pady=10).pack()
-
-tk.Button(root, text="Start Rendering", command=start_rendering, **style, padx=30,pady=10).pack()
-
-root.mainloop()
+# The window is only built when run as a script; fbx_render.py holds the reusable parts
+if __name__ == '__main__':
+    root = tk.Tk()
+    root.title("FBX to PNG")
+    root.geometry("600x680")
+
+    # Dark theme colors
+    dark_color = "#333333"
+    light_color = "#eeeeee"
+
+    # Set the color scheme
+    root.configure(bg=dark_color)
+    style = {"bg": dark_color, "fg": light_color}
+
+    # Define the StringVar objects
+    fbx_dir = tk.StringVar()
+    output_dir = tk.StringVar()
+    blender_path = tk.StringVar()
+    worker_count = tk.StringVar(value=str(os.cpu_count() or 1))
+    files_per_blender = tk.StringVar(value="25")
+    timeout_seconds = tk.StringVar(value="600")
+    progress_text = tk.StringVar()
+    force_rebuild = tk.BooleanVar(value=False)
+    include_globs = tk.StringVar()
+    exclude_globs = tk.StringVar()
+    depth_limit = tk.StringVar()
+    view_count = tk.StringVar(value="1")
+    atlas_columns = tk.StringVar()
+
+    tk.Label(root, text="FBX Directory:", **style, padx=30,pady=10).pack()
+    tk.Entry(root, textvariable=fbx_dir, bg=light_color, fg=dark_color, width=95).pack()
+    tk.Button(root, text="Browse", command=lambda: select_directory(fbx_dir), **style, padx=30,pady=10).pack()
+
+    tk.Label(root, text="Output Directory:", **style, padx=30,pady=10).pack()
+    tk.Entry(root, textvariable=output_dir, bg=light_color, fg=dark_color, width=95).pack()
+    tk.Button(root, text="Browse", command=lambda: select_directory(output_dir), **style, padx=30,pady=10).pack()
+
+    tk.Label(root, text="Blender Executable:", **style, padx=30,pady=10).pack()
+    tk.Entry(root, textvariable=blender_path, bg=light_color, fg=dark_color, width=95).pack()
+    tk.Button(root, text="Browse", command=lambda: select_file(blender_path), **style, padx=30,pady=10).pack()
+
+    # Discovery filters
+    filter_frame = tk.Frame(root, bg=dark_color)
+    filter_frame.pack(pady=10)
+    tk.Label(filter_frame, text="Include:", **style).pack(side=tk.LEFT)
+    tk.Entry(filter_frame, textvariable=include_globs, bg=light_color, fg=dark_color, width=18).pack(side=tk.LEFT, padx=10)
+    tk.Label(filter_frame, text="Exclude:", **style).pack(side=tk.LEFT)
+    tk.Entry(filter_frame, textvariable=exclude_globs, bg=light_color, fg=dark_color, width=18).pack(side=tk.LEFT, padx=10)
+    tk.Label(filter_frame, text="Max Depth:", **style).pack(side=tk.LEFT)
+    tk.Entry(filter_frame, textvariable=depth_limit, bg=light_color, fg=dark_color, width=5).pack(side=tk.LEFT, padx=10)
+
+    # Render pool settings
+    settings_frame = tk.Frame(root, bg=dark_color)
+    settings_frame.pack(pady=10)
+    tk.Label(settings_frame, text="Parallel Renders:", **style).pack(side=tk.LEFT)
+    tk.Spinbox(settings_frame, from_=1, to=(os.cpu_count() or 1) * 4, textvariable=worker_count, width=5,
+               bg=light_color, fg=dark_color).pack(side=tk.LEFT, padx=10)
+    tk.Label(settings_frame, text="Files per Blender:", **style).pack(side=tk.LEFT)
+    tk.Spinbox(settings_frame, from_=1, to=1000, textvariable=files_per_blender, width=5,
+               bg=light_color, fg=dark_color).pack(side=tk.LEFT, padx=10)
+    tk.Label(settings_frame, text="Timeout per File (s):", **style).pack(side=tk.LEFT)
+    tk.Entry(settings_frame, textvariable=timeout_seconds, bg=light_color, fg=dark_color, width=8).pack(side=tk.LEFT, padx=10)
+
+    # Turntable settings
+    views_frame = tk.Frame(root, bg=dark_color)
+    views_frame.pack(pady=10)
+    tk.Label(views_frame, text="Views per Asset:", **style).pack(side=tk.LEFT)
+    tk.Spinbox(views_frame, from_=1, to=36, textvariable=view_count, width=5,
+               bg=light_color, fg=dark_color).pack(side=tk.LEFT, padx=10)
+    tk.Label(views_frame, text="Atlas Columns (blank = auto):", **style).pack(side=tk.LEFT)
+    tk.Entry(views_frame, textvariable=atlas_columns, bg=light_color, fg=dark_color, width=5).pack(side=tk.LEFT, padx=10)
+
+    tk.Checkbutton(root, text="Force Rebuild (ignore render cache)", variable=force_rebuild, **style,
+                   selectcolor=dark_color, activebackground=dark_color, activeforeground=light_color).pack()
+
+    button_frame = tk.Frame(root, bg=dark_color)
+    button_frame.pack()
+    tk.Button(button_frame, text="Start Rendering", command=start_rendering, **style, padx=30,pady=10).pack(side=tk.LEFT)
+    tk.Button(button_frame, text="Cancel", command=cancel_rendering, **style, padx=30,pady=10).pack(side=tk.LEFT)
+
+    tk.Label(root, textvariable=progress_text, **style, pady=10).pack()
+
+    root.mainloop()
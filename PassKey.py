@@ -1,33 +1,237 @@
 import sys
 import os
-import secrets
-import string
-from PySide2.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QLineEdit, QFileDialog, QMessageBox, QListWidget, QStyledItemDelegate, QListWidgetItem, QRadioButton, QTextEdit
-from PySide2.QtCore import Qt, QMimeData
+import time
+from itertools import islice
+
+_STARTED = time.perf_counter()  # start of the --timing breakdown; Qt's import is most of a cold start
+from PySide2.QtWidgets import QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit, QFileDialog, QMessageBox, QListView, QStyledItemDelegate, QRadioButton, QTextEdit, QProgressBar
+from PySide2.QtCore import Qt, QMimeData, QTimer, QEvent, QAbstractListModel, QModelIndex, QThread, Signal
 from PySide2.QtGui import QColor
-from cryptography.fernet import Fernet
+from passkey_vault import open_vault, VaultError
+from passkey_cache import SecretCache
+from passkey_search import SearchIndex
+from passkey_config import ensure_config_dir
+# cryptography (through passkey_keys), passkey_bulk and passkey_generator are imported
+# where they are first used, so none of them delay the window
+
+IDLE_LOCK_MS = 5 * 60 * 1000  # decrypted secrets are forgotten after this long without input
+LOAD_CHUNK = 2000  # entries added to the list per step while the vault loads
+PAGE_ROWS = 256  # matching entries fetched at a time as the list is scrolled
+
+
+class StartupTimer:
+    # Time spent in each startup phase, printed to stderr with --timing. Phases are
+    # marked from the GUI thread and the loader thread, so they are reported in time order.
+    def __init__(self, started=_STARTED, enabled=False):
+        self.started = started
+        self.enabled = enabled
+        self.marks = []
+
+    def mark(self, phase):
+        self.marks.append((time.perf_counter(), phase))
+
+    def report(self):
+        if not self.enabled:
+            return
+        last = self.started
+        for at, phase in sorted(self.marks):
+            print(f"{phase:>16}: {(at - last) * 1000:8.1f} ms  (at {(at - self.started) * 1000:8.1f} ms)", file=sys.stderr)
+            last = at
+
+
+class AccountListModel(QAbstractListModel):
+    # The entries matching the search box. The index is built once per vault and
+    # updated in place on save and delete. Matches are read from the search a page at
+    # a time as the view scrolls (canFetchMore/fetchMore), and a new query is a layout
+    # change, so the selected entry stays selected if it still matches.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_index = SearchIndex()
+        self.query = ""
+        self.rows = []
+        self.matches = iter(())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        account_name, username = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"Account: {account_name}\nUsername: {username}"
+        if role == Qt.UserRole:
+            return [account_name, username]  # The vault key of the entry
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.matches is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.matches is None:
+            return
+        rows = list(islice(self.matches, PAGE_ROWS))
+        if len(rows) < PAGE_ROWS:
+            self.matches = None  # every match is listed
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def set_entries(self, keys):
+        self.beginResetModel()
+        self.search_index = SearchIndex(keys)
+        self.matches = self.search_index.iter_search(self.query)
+        self.rows = []
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_query(self, query):
+        self.query = query
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        kept = [self.rows[index.row()] if 0 <= index.row() < len(self.rows) else None for index in persistent]
+        self.matches = self.search_index.iter_search(query)
+        self.rows = list(islice(self.matches, PAGE_ROWS))
+        if len(self.rows) < PAGE_ROWS:
+            self.matches = None
+        positions = {key: row for row, key in enumerate(self.rows)}
+        self.changePersistentIndexList(persistent, [self.createIndex(positions[key], 0) if key in positions
+                                                    else QModelIndex() for key in kept])
+        self.layoutChanged.emit()
+
+    def append_entries(self, keys):
+        # Entries arriving while the vault loads. The vault sends them in sorted chunks,
+        # so with no query they simply become more rows to fetch after the listed ones.
+        count = len(self.search_index)
+        last = self.search_index.keys[-1] if count else None
+        self.search_index.extend(keys)
+        if len(self.search_index) == count:
+            return
+        # An entry inserted in the middle moves the last one down
+        if self.query.strip() or (count and self.search_index.keys[count - 1] != last):
+            self.set_query(self.query)
+            return
+        self.matches = iter(self.search_index.keys[len(self.rows):])
+        if len(self.rows) < PAGE_ROWS:
+            self.fetchMore()  # the view only asks for more once it is scrolled
+
+    def add(self, account_name, username):
+        if (account_name, username) not in self.search_index:
+            self.search_index.add(account_name, username)
+            self.set_query(self.query)
+
+    def remove(self, account_name, username):
+        self.search_index.remove(account_name, username)
+        self.set_query(self.query)
+
+
+class BulkWorker(QThread):
+    # Runs an import or export off the GUI thread. The task is called as
+    # task(progress, should_stop) and returns its report.
+    progress_changed = Signal(int, int)
+    task_finished = Signal(object, str)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+
+    def run(self):
+        from passkey_bulk import CsvFormatError
+        report = None
+        error = ""
+        last_emit = 0.0
+
+        def progress(done, total):
+            nonlocal last_emit
+            # Batch the updates so a big file does not flood the GUI thread with signals
+            if time.monotonic() - last_emit >= 0.1 or done == total:
+                last_emit = time.monotonic()
+                self.progress_changed.emit(done, total)
+
+        try:
+            report = self.task(progress, self.isInterruptionRequested)
+        except (OSError, ValueError, CsvFormatError, VaultError) as e:
+            error = str(e)
+        self.task_finished.emit(report, error)
+
+
+class StartupLoader(QThread):
+    # Loads the encryption keys and opens the vault after the window is on screen.
+    # The cipher is sent first, then the entries in sorted chunks, so the GUI thread
+    # only ever spends a moment adding rows and stays responsive on a large vault.
+    keys_loaded = Signal(object)  # (keys, cipher)
+    vault_opened = Signal(object)
+    entries_found = Signal(object)
+    loading_finished = Signal(str)
+
+    def __init__(self, key_path, main_directory, timer, parent=None):
+        super().__init__(parent)
+        self.key_path = key_path
+        self.main_directory = main_directory
+        self.timer = timer
+        self.vault = None
+
+    def run(self):
+        error = ""
+        try:
+            from passkey_keys import read_keys, write_keys, make_cipher, register_vault
+            self.timer.mark("crypto import")
+            keys = read_keys(self.key_path) if os.path.exists(self.key_path) else []
+            if not keys:
+                # Generate a new encryption key if it doesn't exist
+                from cryptography.fernet import Fernet
+                keys = [Fernet.generate_key()]
+                write_keys(self.key_path, keys)
+            self.keys_loaded.emit((keys, make_cipher(keys)))
+            self.timer.mark("keys")
+
+            if self.main_directory and os.path.isdir(self.main_directory):
+                # Migrates old _password.txt files the first time
+                self.vault = open_vault(self.main_directory)
+                self.vault_opened.emit(self.vault)
+                register_vault(self.vault, self.key_path, keys)
+                self.timer.mark("vault open")
+                entries = self.vault.entries()
+                for start in range(0, len(entries), LOAD_CHUNK):
+                    if self.isInterruptionRequested():
+                        break
+                    self.entries_found.emit(entries[start:start + LOAD_CHUNK])
+        except (OSError, ValueError, VaultError) as e:
+            error = str(e)
+        self.loading_finished.emit(error)
+
 
 class PasswordGeneratorApp(QWidget):
-    def __init__(self):
+    def __init__(self, timer=None):
         super().__init__()
 
         self.main_directory = None  # Initialize main_directory attribute
-        self.encryption_key = None  # Initialize encryption_key attribute
+        self.encryption_keys = None  # Newest first; entries are encrypted with the first
+        self.vault = None  # Single vault file in main_directory, opened by the startup loader or on refresh
+        self.secret_cache = SecretCache(max_entries=16, ttl=120)  # recently decrypted passwords and codes
+        self.bulk_worker = None  # running CSV import or export
+        self.showing_entry = False  # an opened entry's secrets are on screen
+        self.cipher_suite = None  # Encrypts with the newest key, decrypts with any; set once the keys load
+        self.loader = None  # loads the keys and vault in the background at startup
+        self.timer = timer or StartupTimer()
+        self.config_directory = ensure_config_dir()  # settings and keys, e.g. ~/.config/passkey
 
         self.directory_label = QLabel(self)  # Define directory_label
         self.init_ui()  # Initialize the user interface
 
-        self.load_main_directory()  # Load the main directory path and encryption key
-        self.load_encryption_key()  # Load the encryption key
-
-        if self.encryption_key is None:
-            # Generate a new encryption key if it doesn't exist
-            self.encryption_key = Fernet.generate_key()
-            self.save_encryption_key()  # Save the encryption key securely
+        self.load_main_directory()  # Load the main directory path; the key and vault load in start_loading
 
-        self.refresh_listbox()  # Refresh the listbox on program load
-
-        self.cipher_suite = Fernet(self.encryption_key)  # Initialize the cipher suite with the key
+        # Expired secrets are zeroed even when nothing reads the cache, and all of
+        # them when the user has been idle for a while
+        self.expire_timer = QTimer(self)
+        self.expire_timer.timeout.connect(self.secret_cache.expire)
+        self.expire_timer.start(15000)
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.lock_secrets)
+        self.idle_timer.start(IDLE_LOCK_MS)
+        QApplication.instance().installEventFilter(self)
 
     def init_ui(self):
         self.setWindowTitle("Password Generator")
@@ -90,18 +294,33 @@ class PasswordGeneratorApp(QWidget):
 
         # Select Directory button with dark black background and padding
         self.load_button = QPushButton("Select Directory", self)
-        self.load_button.clicked.connect(self.load_password)  # Fixed method name
+        self.load_button.clicked.connect(self.select_directory)
         self.load_button.setStyleSheet("background-color: #4D4D4D; color: #BEBEBE; padding: 10px; height: 40px;")
         layout.addWidget(self.load_button)
 
         # Define directory_label here
         layout.addWidget(self.directory_label)
 
-        self.listbox = QListWidget(self)
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("Search Accounts")
+        self.search_input.setStyleSheet("border: 2px solid #696969;")
+        self.search_input.setClearButtonEnabled(True)
+        layout.addWidget(self.search_input)
+
+        self.account_model = AccountListModel(self)
+        self.search_input.textChanged.connect(self.account_model.set_query)
+        self.listbox = QListView(self)
+        self.listbox.setModel(self.account_model)
+        self.listbox.setUniformItemSizes(True)  # rows are not measured one by one
         self.listbox.setItemDelegate(StyledItemDelegate(self.listbox))  # Custom delegate for styling
-        self.listbox.itemDoubleClicked.connect(self.load_password)
+        self.listbox.doubleClicked.connect(self.load_password)
         layout.addWidget(self.listbox)
 
+        self.delete_button = QPushButton("Delete Entry", self)
+        self.delete_button.clicked.connect(self.delete_password)
+        self.delete_button.setStyleSheet("background-color: #4D4D4D; color: #BEBEBE; padding: 10px; height: 40px;")
+        layout.addWidget(self.delete_button)
+
         self.refresh_button = QPushButton("Refresh", self)
         self.refresh_button.clicked.connect(self.refresh_listbox)
         self.refresh_button.setStyleSheet("background-color: #4D4D4D; color: #BEBEBE; padding: 10px; height: 40px;")
@@ -117,6 +336,25 @@ class PasswordGeneratorApp(QWidget):
         self.copy_codes_button.setStyleSheet("background-color: #4D4D4D; color: #BEBEBE; padding: 10px; height: 40px;")
         layout.addWidget(self.copy_codes_button)
 
+        # Bulk import and export run on a worker thread with a progress bar
+        bulk_layout = QHBoxLayout()
+        self.import_button = QPushButton("Import CSV", self)
+        self.import_button.clicked.connect(self.import_passwords)
+        self.export_button = QPushButton("Export CSV", self)
+        self.export_button.clicked.connect(self.export_passwords)
+        self.rotate_button = QPushButton("Rotate Key", self)
+        self.rotate_button.clicked.connect(lambda: self.rotate_key())
+        self.cancel_bulk_button = QPushButton("Cancel", self)
+        self.cancel_bulk_button.clicked.connect(self.cancel_bulk)
+        self.cancel_bulk_button.setEnabled(False)
+        for button in (self.import_button, self.export_button, self.rotate_button, self.cancel_bulk_button):
+            button.setStyleSheet("background-color: #4D4D4D; color: #BEBEBE; padding: 10px; height: 40px;")
+            bulk_layout.addWidget(button)
+        layout.addLayout(bulk_layout)
+        self.bulk_progress = QProgressBar(self)
+        self.bulk_progress.hide()
+        layout.addWidget(self.bulk_progress)
+
         self.setLayout(layout)
     def toggle_password_input(self):
         if self.use_custom_password_radio.isChecked():
@@ -127,17 +365,16 @@ class PasswordGeneratorApp(QWidget):
             self.password_input.setEnabled(False)
 
     def generate_password(self):
-        while True:
-            length = 25  # Adjusted to 25 characters
-            characters = string.ascii_letters + string.digits + string.punctuation
-            password = ''.join(secrets.choice(characters) for _ in range(length))
-            if len(password) >= 25:
-                self.generated_password = password
-                self.password_label.setText(password)
-                break
+        from passkey_generator import PasswordPolicy, generate_password
+        # 25 characters with at least one lower, upper, digit and symbol
+        password = generate_password(PasswordPolicy(length=25))
+        self.generated_password = password
+        self.password_label.setText(password)
 
     def copy_to_clipboard(self):
         clipboard = QApplication.clipboard()
+        if not getattr(self, 'generated_password', None):
+            return
         mime_data = QMimeData()
         mime_data.setText(self.generated_password)
         clipboard.setMimeData(mime_data)
@@ -151,7 +388,7 @@ class PasswordGeneratorApp(QWidget):
         if not account_name or not username or not plaintext_password:
             return
 
-        if not self.main_directory:
+        if not self.main_directory or self.open_vault() is None:
             QMessageBox.warning(self, "Directory Not Set", "Please select a main directory first.")
             return
 
@@ -159,10 +396,16 @@ class PasswordGeneratorApp(QWidget):
         encrypted_password = self.cipher_suite.encrypt(plaintext_password.encode()).decode()
         encrypted_codes = self.cipher_suite.encrypt(codes.encode()).decode()
 
-        # Save the encrypted password and codes to a file in the main directory
-        filename = os.path.join(self.main_directory, f"{account_name}_{username}_password.txt")
-        with open(filename, 'w') as file:
-            file.write(f"Encrypted Password: {encrypted_password}\nEncrypted Codes: {encrypted_codes}")
+        # Append the entry to the vault; replacing an entry leaves the old record for compaction
+        try:
+            self.vault.put(account_name, username, encrypted_password, encrypted_codes)
+        except OSError as e:
+            QMessageBox.warning(self, "Save Failed", str(e))
+            return
+        self.secret_cache.discard((account_name, username, 'password'))
+        self.secret_cache.discard((account_name, username, 'codes'))
+        self.vault.maybe_compact()
+        self.account_model.add(account_name, username)
 
         # Clear input fields
         self.account_input.clear()
@@ -173,92 +416,330 @@ class PasswordGeneratorApp(QWidget):
 
         QMessageBox.information(self, "Success", "Password and Codes saved successfully!")
 
-    def load_password(self, item):
-        data = item.data(Qt.UserRole)  # Retrieve the full item data
-        lines = data.split('\n')
+    def decrypt_field(self, account_name, username, field):
+        # 'password' or 'codes' of an entry, from the cache or read from the vault and decrypted.
+        # Returns '' for an empty field and raises on a missing or undecryptable entry.
+        key = (account_name, username, field)
+        plaintext = self.secret_cache.get(key)
+        if plaintext is None:
+            encrypted = self.vault.get(account_name, username)[field]
+            plaintext = self.cipher_suite.decrypt(encrypted.encode()).decode() if encrypted else ''
+            self.secret_cache.put(key, plaintext)
+        return plaintext
+
+    def load_password(self, item):  # a model index from the list view
+        if self.cipher_suite is None:
+            return  # the keys are still loading
+        account_name, username = item.data(Qt.UserRole)  # Items only hold the vault key
+        self.showing_entry = True
+
+        # Ask the user if they want to view the original password
+        response = QMessageBox.question(self, "View Original Password", "Do you want to view the original password?", QMessageBox.Yes | QMessageBox.No)
+        if response == QMessageBox.Yes:
+            # Decrypt the encrypted password and display it
+            try:
+                plaintext_password = self.decrypt_field(account_name, username, 'password')
+                self.password_label.setText(plaintext_password)
+                self.generated_password = plaintext_password
+            except Exception as e:
+                self.password_label.setText("Error decrypting password")
+        else:
+            self.password_label.setText("Password is encrypted")
 
-        encrypted_password = None
-        encrypted_codes = None
+        # Decrypt the encrypted codes and display them
+        try:
+            self.text_edit.setPlainText(self.decrypt_field(account_name, username, 'codes'))
+        except Exception as e:
+            self.text_edit.clear()
 
-        for line in lines:
-            if line.startswith("Encrypted Password: "):
-                encrypted_password = line.replace('Encrypted Password: ', '')
-            elif line.startswith("Encrypted Codes: "):
-                encrypted_codes = line.replace('Encrypted Codes: ', '')
+    def lock_secrets(self):
+        # Zeroes the cached secrets and takes an opened entry off the screen
+        self.secret_cache.clear()
+        if self.showing_entry:
+            self.showing_entry = False
+            self.password_label.setText("Password is encrypted")
+            self.generated_password = None
+            self.text_edit.clear()
 
-        if encrypted_password:
-            # Ask the user if they want to view the original password
-            response = QMessageBox.question(self, "View Original Password", "Do you want to view the original password?", QMessageBox.Yes | QMessageBox.No)
-            if response == QMessageBox.Yes:
-                # Decrypt the encrypted password and display it
-                try:
-                    plaintext_password = self.cipher_suite.decrypt(encrypted_password.encode()).decode()
-                    self.password_label.setText(plaintext_password)
-                    self.generated_password = plaintext_password
-                except Exception as e:
-                    self.password_label.setText("Error decrypting password")
-            else:
-                self.password_label.setText("Password is encrypted")
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.KeyPress, QEvent.MouseButtonPress, QEvent.Wheel):
+            self.idle_timer.start(IDLE_LOCK_MS)
+        return False
 
-        if encrypted_codes:
-            # Decrypt the encrypted codes and display them
+    def changeEvent(self, event):
+        if event.type() == QEvent.WindowStateChange and self.isMinimized():
+            self.lock_secrets()
+        super().changeEvent(event)
+
+    def hideEvent(self, event):
+        self.lock_secrets()
+        super().hideEvent(event)
+
+    def select_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select Directory", self.main_directory or "")
+        if not directory:
+            return
+        if self.vault is not None:
+            self.vault.close()
+            self.vault = None
+        self.secret_cache.clear()
+        self.main_directory = directory
+        self.save_main_directory()
+        self.directory_label.setText(f"Selected Directory: {self.main_directory}")
+        self.refresh_listbox()
+
+    def open_vault(self):
+        # Opens the vault in main_directory, migrating old _password.txt files the first time
+        if self.vault is None and self.main_directory and os.path.isdir(self.main_directory):
+            from passkey_keys import register_vault
             try:
-                plaintext_codes = self.cipher_suite.decrypt(encrypted_codes.encode()).decode()
-                self.text_edit.setPlainText(plaintext_codes)
-            except Exception as e:
-                self.text_edit.clear()
-        else:
-            self.text_edit.clear()
+                self.vault = open_vault(self.main_directory)
+                register_vault(self.vault, self.key_path(), self.encryption_keys)  # its keys are kept through rotations
+            except (OSError, VaultError) as e:
+                QMessageBox.warning(self, "Vault Error", str(e))
+            else:
+                QTimer.singleShot(0, self.check_rotation)
+        return self.vault
 
     def refresh_listbox(self):
-        if self.main_directory:
-            self.listbox.clear()
-            for root, _, files in os.walk(self.main_directory):
-                for file in files:
-                    if file.endswith("_password.txt"):
-                        parts = os.path.splitext(file)[0].split('_')
-                        if len(parts) >= 3:
-                            account_name = ' '.join(parts[:-2])
-                            username = parts[-2]
-                            with open(os.path.join(root, file), 'r') as file:
-                                data = file.read()
-                                item = QListWidgetItem(f"Account: {account_name}\nUsername: {username}")
-                                item.setData(Qt.UserRole, data)  # Store the full item data as user data
-                            self.listbox.addItem(item)
+        # Built from the vault index alone; no record is read
+        if self.open_vault() is None:
+            return
+        self.account_model.set_entries(self.vault.entries())
+
+    def delete_password(self):
+        index = self.listbox.currentIndex()
+        if not index.isValid():
+            return
+        account_name, username = index.data(Qt.UserRole)
+        response = QMessageBox.question(self, "Delete Entry", f"Delete {account_name} ({username})?", QMessageBox.Yes | QMessageBox.No)
+        if response != QMessageBox.Yes:
+            return
+        try:
+            self.vault.delete(account_name, username)
+        except OSError as e:
+            QMessageBox.warning(self, "Delete Failed", str(e))
+            return
+        self.secret_cache.discard((account_name, username, 'password'))
+        self.secret_cache.discard((account_name, username, 'codes'))
+        self.account_model.remove(account_name, username)
+        self.vault.maybe_compact()
 
     def save_main_directory(self):
-        # Save the selected main directory path to a text file
-        main_dir_path = os.path.join("C:\\", "password_directory")  # Correct directory name
-        if not os.path.exists(main_dir_path):
-            os.makedirs(main_dir_path)
-        with open(os.path.join(main_dir_path, "main_directory.txt"), 'w') as file:
+        # Save the selected main directory path to a text file in the config directory
+        with open(os.path.join(self.config_directory, "main_directory.txt"), 'w') as file:
             file.write(self.main_directory)
 
     def load_main_directory(self):
         # Load the selected main directory path from the text file
-        main_dir_path = os.path.join("C:\\", "password_directory")  # Correct directory name
-        if os.path.exists(main_dir_path):
-            try:
-                with open(os.path.join(main_dir_path, "main_directory.txt"), 'r') as file:
-                    self.main_directory = file.read()
-                    if os.path.exists(self.main_directory):
-                        self.directory_label.setText(f"Selected Directory: {self.main_directory}")
-            except FileNotFoundError:
-                pass
-
-    def save_encryption_key(self):
-        main_dir_path = os.path.join("C:\\", "password_directory")
-        if not os.path.exists(main_dir_path):
-            os.makedirs(main_dir_path)
-        with open(os.path.join(main_dir_path, "encryption_key.txt"), 'wb') as file:
-            file.write(self.encryption_key)
+        try:
+            with open(os.path.join(self.config_directory, "main_directory.txt"), 'r') as file:
+                self.main_directory = file.read()
+                if os.path.exists(self.main_directory):
+                    self.directory_label.setText(f"Selected Directory: {self.main_directory}")
+        except FileNotFoundError:
+            pass
+
+    def key_path(self):
+        return os.path.join(self.config_directory, "encryption_key.txt")
 
     def load_encryption_key(self):
-        main_dir_path = os.path.join("C:\\", "password_directory")
-        key_path = os.path.join(main_dir_path, "encryption_key.txt")
-        if os.path.exists(key_path):
-            with open(key_path, 'rb') as file:
-                self.encryption_key = file.read()
+        from passkey_keys import read_keys
+        if os.path.exists(self.key_path()):
+            self.encryption_keys = read_keys(self.key_path())
+
+    def start_loading(self):
+        # Keys and vault load on a worker thread once the window is up; the buttons
+        # that need them wait until it finishes
+        self.set_actions_enabled(False)
+        self.bulk_progress.setRange(0, 0)
+        self.bulk_progress.show()
+        self.loader = StartupLoader(self.key_path(), self.main_directory, self.timer, self)
+        self.loader.keys_loaded.connect(self.keys_loaded)
+        self.loader.vault_opened.connect(self.vault_opened)
+        self.loader.entries_found.connect(self.account_model.append_entries)
+        self.loader.loading_finished.connect(self.loading_finished)
+        self.loader.start()
+
+    def keys_loaded(self, loaded):
+        self.encryption_keys, self.cipher_suite = loaded
+
+    def vault_opened(self, vault):
+        self.vault = vault
+        self.account_model.set_entries([])
+
+    def loading_finished(self, error):
+        self.loader.wait()
+        self.loader.deleteLater()
+        self.loader = None
+        self.bulk_progress.hide()
+        self.set_actions_enabled(self.cipher_suite is not None)  # nothing works without the keys
+        self.timer.mark("list filled")
+        self.timer.report()
+        if error:
+            QMessageBox.warning(self, "Loading Failed", error)
+        elif self.vault is not None:
+            self.check_rotation()
+
+    def rotate_key(self, resume=False):
+        if not self.main_directory or self.open_vault() is None:
+            QMessageBox.warning(self, "Directory Not Set", "Please select a main directory first.")
+            return
+        if not resume:
+            response = QMessageBox.question(self, "Rotate Key", "Re-encrypt every entry with a new key? Entries stay readable while this runs.", QMessageBox.Yes | QMessageBox.No)
+            if response != QMessageBox.Yes:
+                return
+        from passkey_keys import make_cipher, start_rotation, rotate_keys
+        # The new key goes into the key file first, so entries already rotated can be
+        # opened while the rest are re-encrypted
+        try:
+            self.encryption_keys = start_rotation(self.vault, self.key_path())
+        except OSError as e:
+            QMessageBox.warning(self, "Rotation Failed", str(e))
+            return
+        self.cipher_suite = make_cipher(self.encryption_keys)
+        vault, key_path = self.vault, self.key_path()
+        self.run_bulk_task(lambda progress, should_stop: rotate_keys(vault, key_path, progress=progress,
+                                                                     should_stop=should_stop), self.rotation_finished)
+
+    def rotation_finished(self, report, error):
+        from passkey_keys import make_cipher
+        self.finish_bulk_task()
+        self.load_encryption_key()  # old keys no other vault needs are gone once the rotation finished
+        self.cipher_suite = make_cipher(self.encryption_keys)
+        self.secret_cache.clear()
+        if error:
+            QMessageBox.warning(self, "Rotation Failed", f"{error}\n\nThe rotation continues from where it stopped next time.")
+        elif report['errors']:
+            QMessageBox.warning(self, "Rotation Stopped", "These entries could not be decrypted; the old key is kept:\n" + "\n".join(f"{entry}: {text}" for entry, text in report['errors'][:10]))
+        elif report['cancelled']:
+            QMessageBox.information(self, "Rotate Key", f"Rotation paused after {report['rotated']:,} entries. It continues from there next time.")
+        else:
+            message = f"Re-encrypted {report['rotated']:,} entries in {report['seconds']:.1f}s."
+            if report['dropped']:
+                message += f" {report['dropped']} old key(s) no vault needs any more have been removed."
+            else:
+                message += " The old key is kept until the other vaults using it are rotated too."
+            QMessageBox.information(self, "Rotate Key", message)
+
+    def check_rotation(self):
+        # An interrupted rotation is offered again when its vault is opened
+        from passkey_keys import rotation_pending
+        if self.vault is not None and self.bulk_worker is None and rotation_pending(self.vault):
+            response = QMessageBox.question(self, "Unfinished Key Rotation", "A key rotation did not finish. Continue it now?", QMessageBox.Yes | QMessageBox.No)
+            if response == QMessageBox.Yes:
+                self.rotate_key(resume=True)
+
+    def set_actions_enabled(self, enabled):
+        # The buttons that use the vault or the keys, off while a background task needs them
+        for button in (self.import_button, self.export_button, self.rotate_button, self.save_button, self.load_button, self.delete_button, self.refresh_button):
+            button.setEnabled(enabled)
+
+    def run_bulk_task(self, task, on_done):
+        self.bulk_worker = BulkWorker(task, self)
+        self.bulk_worker.progress_changed.connect(self.bulk_progress_changed)
+        self.bulk_worker.task_finished.connect(on_done)
+        self.set_actions_enabled(False)
+        self.cancel_bulk_button.setEnabled(True)
+        self.bulk_progress.setRange(0, 0)
+        self.bulk_progress.show()
+        self.bulk_worker.start()
+
+    def bulk_progress_changed(self, done, total):
+        # File sizes can pass the int range of the bar, so it shows per mille
+        self.bulk_progress.setRange(0, 1000)
+        self.bulk_progress.setValue(done * 1000 // max(1, total))
+
+    def cancel_bulk(self):
+        if self.bulk_worker is not None:
+            self.bulk_worker.requestInterruption()
+            self.cancel_bulk_button.setEnabled(False)
+
+    def finish_bulk_task(self):
+        self.bulk_worker.wait()
+        self.bulk_worker.deleteLater()
+        self.bulk_worker = None
+        self.bulk_progress.hide()
+        self.set_actions_enabled(True)
+        self.cancel_bulk_button.setEnabled(False)
+
+    def import_passwords(self):
+        if not self.main_directory or self.open_vault() is None:
+            QMessageBox.warning(self, "Directory Not Set", "Please select a main directory first.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Import Passwords", "", "CSV Files (*.csv)")
+        if not path:
+            return
+        from passkey_bulk import import_csv
+        vault, cipher_suite = self.vault, self.cipher_suite
+        self.import_path = path
+        self.run_bulk_task(lambda progress, should_stop: import_csv(path, vault, cipher_suite, progress=progress,
+                                                                    should_stop=should_stop), self.import_finished)
+
+    def import_finished(self, report, error):
+        from passkey_bulk import write_error_report
+        self.finish_bulk_task()
+        if error:
+            QMessageBox.warning(self, "Import Failed", error)
+            return
+        self.secret_cache.clear()  # imported rows may replace entries that were viewed
+        self.refresh_listbox()
+        message = f"Imported {report['imported']:,} entries in {report['seconds']:.1f}s."
+        if report['cancelled']:
+            message = "Import cancelled; nothing was added."
+        if report['errors']:
+            error_path = os.path.splitext(self.import_path)[0] + "_import_errors.csv"
+            try:
+                write_error_report(error_path, report['errors'])
+                message += f"\n\n{len(report['errors']):,} rows were skipped; see {error_path}"
+            except OSError:
+                message += f"\n\n{len(report['errors']):,} rows were skipped"
+            message += "\n" + "\n".join(f"Line {line}: {text}" for line, text in report['errors'][:10])
+        QMessageBox.information(self, "Import", message)
+
+    def export_passwords(self):
+        if not self.main_directory or self.open_vault() is None:
+            QMessageBox.warning(self, "Directory Not Set", "Please select a main directory first.")
+            return
+        response = QMessageBox.question(self, "Export Passwords", "The exported file holds every password as plain text. Continue?", QMessageBox.Yes | QMessageBox.No)
+        if response != QMessageBox.Yes:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Passwords", "passkey_export.csv", "CSV Files (*.csv)")
+        if not path:
+            return
+        from passkey_bulk import export_csv
+        vault, cipher_suite = self.vault, self.cipher_suite
+        self.run_bulk_task(lambda progress, should_stop: export_csv(path, vault, cipher_suite, progress=progress,
+                                                                    should_stop=should_stop), self.export_finished)
+
+    def export_finished(self, report, error):
+        self.finish_bulk_task()
+        if error:
+            QMessageBox.warning(self, "Export Failed", error)
+            return
+        if report['cancelled']:
+            QMessageBox.information(self, "Export", "Export cancelled; no file was written.")
+            return
+        message = f"Exported {report['exported']:,} entries in {report['seconds']:.1f}s."
+        if report['errors']:
+            message += f"\n\n{len(report['errors']):,} entries could not be decrypted:\n" + "\n".join(
+                f"{entry}: {text}" for entry, text in report['errors'][:10])
+        QMessageBox.information(self, "Export", message)
+
+    def closeEvent(self, event):
+        if self.loader is not None:
+            self.loader.requestInterruption()
+            self.loader.wait()
+            if self.vault is None and self.loader.vault is not None:
+                self.loader.vault.close()  # opened but never handed to the window
+        if self.bulk_worker is not None:
+            # An unfinished import adds nothing and an unfinished export leaves no file
+            self.bulk_worker.requestInterruption()
+            self.bulk_worker.wait()
+        self.lock_secrets()
+        if self.vault is not None:
+            self.vault.close()  # waits for a background compaction to finish
+        super().closeEvent(event)
 
     def copy_text_to_clipboard(self):
         clipboard = QApplication.clipboard()
@@ -278,9 +759,17 @@ class StyledItemDelegate(QStyledItemDelegate):
 
 
 def main():
-    app = QApplication(sys.argv)
-    window = PasswordGeneratorApp()
+    # --timing prints how long each startup phase took once the list is filled
+    timer = StartupTimer(enabled='--timing' in sys.argv)
+    timer.mark("imports")
+    app = QApplication([arg for arg in sys.argv if arg != '--timing'])
+    timer.mark("qapplication")
+    window = PasswordGeneratorApp(timer)
+    timer.mark("window")
     window.show()
+    timer.mark("show")
+    # Started from the event loop so the window is drawn before the keys and vault load
+    QTimer.singleShot(0, lambda: (timer.mark("event loop"), window.start_loading()))
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
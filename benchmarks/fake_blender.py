@@ -0,0 +1,62 @@
+# Stand-in for the Blender executable used by the render benchmarks.
+# It speaks the same protocol as the script fbx_render.py sends to Blender, but
+# only sleeps and writes a tiny PNG. Delays come from the environment:
+#   FAKE_BLENDER_STARTUP  seconds spent launching (default 0.2)
+#   FAKE_BLENDER_RENDER   seconds per rendered view (default 0.05)
+import os
+import re
+import sys
+import ast
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fbx_render import RESULT_MARKER, PHASES_MARKER
+
+# Smallest valid PNG: one transparent pixel
+PNG_BYTES = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082')
+
+
+def render(fbx_file, output_file, settings, delay):
+    views = len(settings.get('views') or []) or 1
+    started = time.perf_counter()
+    time.sleep(delay * views)
+    rendered = time.perf_counter()
+    with open(output_file, 'wb') as file:
+        file.write(PNG_BYTES)
+    return {'import': 0.0, 'scene_setup': 0.0, 'render': rendered - started,
+            'save': time.perf_counter() - rendered}
+
+
+def main(argv):
+    if '--version' in argv:
+        print("Blender 0.0.0 (fake)")
+        return 0
+
+    script = argv[argv.index('--python-expr') + 1]
+    job = json.loads(ast.literal_eval(re.search(r'^JOB = json\.loads\((.*)\)$', script, re.M).group(1)))
+    delay = float(os.environ.get('FAKE_BLENDER_RENDER', '0.05'))
+    time.sleep(float(os.environ.get('FAKE_BLENDER_STARTUP', '0.2')))
+
+    if not job['batch']:
+        phases = render(job['fbx_file'], job['output_file'], job['settings'], delay)
+        print(PHASES_MARKER + json.dumps(phases), flush=True)
+        return 0
+
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        fbx_file, output_file = json.loads(line)
+        try:
+            result = [fbx_file, 'ok', None, render(fbx_file, output_file, job['settings'], delay)]
+        except OSError as e:
+            result = [fbx_file, 'error', repr(e), None]
+        print(RESULT_MARKER + json.dumps(result), flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
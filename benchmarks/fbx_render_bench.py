@@ -0,0 +1,150 @@
+# Benchmarks the Python side of the FBX renderer against a fake Blender.
+# Blender's own cost is fixed by the fake's delays, so anything above the ideal
+# time is discovery, script templating, process spawning or result collection.
+#
+#   python benchmarks/fbx_render_bench.py --sizes 100,1000 --depths 1,4 -o bench_fbx_render.json
+import os
+import sys
+import json
+import stat
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fbx_render import iter_fbx_files, build_single_script, RenderPool
+
+FAKE_BLENDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_blender.py')
+
+
+def make_launcher(directory):
+    # Popen needs an executable; wrap the fake in a shell script bound to this interpreter (POSIX only)
+    path = os.path.join(directory, 'blender')
+    with open(path, 'w') as file:
+        file.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_BLENDER}" "$@"\n')
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+    return path
+
+
+def make_tree(root, files, depth, fanout=4, file_size=4096):
+    # Spread `files` fake FBX files over a tree `depth` levels deep
+    directories = [root]
+    for _ in range(depth):
+        directories = [os.path.join(parent, f'dir_{i}') for parent in directories for i in range(fanout)]
+    for directory in directories:
+        os.makedirs(directory, exist_ok=True)
+    payload = os.urandom(file_size)
+    for i in range(files):
+        with open(os.path.join(directories[i % len(directories)], f'asset_{i:06d}.fbx'), 'wb') as file:
+            file.write(payload)
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def bench_discovery(tree):
+    # Time to the first file is what delays the first render when discovery streams
+    started = time.perf_counter()
+    first = None
+    files = 0
+    for _ in iter_fbx_files(tree):
+        if first is None:
+            first = time.perf_counter() - started
+        files += 1
+    return {'files': files, 'seconds': time.perf_counter() - started, 'first_file_seconds': first}
+
+
+def bench_templating(files, output_dir):
+    started = time.perf_counter()
+    for fbx_file in files:
+        build_single_script(fbx_file, output_dir)
+    elapsed = time.perf_counter() - started
+    return {'scripts': len(files), 'seconds': elapsed,
+            'microseconds_per_script': elapsed / max(1, len(files)) * 1e6}
+
+
+def bench_mode(blender, tree, output_dir, workers, files_per_process, startup, render):
+    records = []
+    pool = RenderPool(blender, output_dir, workers=workers, files_per_process=files_per_process,
+                      use_cache=False, on_result=records.append)
+    started = time.perf_counter()
+    pool.start(iter_fbx_files(tree))
+    pool.wait()
+    elapsed = time.perf_counter() - started
+
+    files = len(records)
+    # Fewest Blender launches possible: every busy worker starts one, and none renders
+    # more than files_per_process files
+    launches = min(files, max(workers, -(-files // files_per_process)))
+    # Lower bound if orchestration were free: Blender time spread evenly over the workers
+    ideal = (launches * startup + files * render) / workers
+    latencies = [record['wall_time'] for record in records if record['wall_time'] is not None]
+    failures = sum(1 for record in records if record['status'] != 'done')
+    return {'workers': workers, 'files_per_process': files_per_process, 'files': files,
+            'failures': failures, 'seconds': elapsed, 'files_per_second': files / elapsed if elapsed else None,
+            'ideal_seconds': ideal, 'overhead_seconds': elapsed - ideal,
+            'latency_p50': percentile(latencies, 50), 'latency_p90': percentile(latencies, 90),
+            'latency_p99': percentile(latencies, 99)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the FBX render orchestration with a fake Blender.")
+    parser.add_argument('--sizes', default='50,200', help="comma-separated file counts")
+    parser.add_argument('--depths', default='1,3', help="comma-separated directory depths")
+    parser.add_argument('--startup', type=float, default=0.2, help="fake Blender startup delay (s)")
+    parser.add_argument('--render', type=float, default=0.02, help="fake Blender render delay (s)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--files-per-process', type=int, default=25)
+    parser.add_argument('--modes', default='sequential,parallel,batched')
+    parser.add_argument('-o', '--output', default='bench_fbx_render.json')
+    args = parser.parse_args(argv)
+
+    os.environ['FAKE_BLENDER_STARTUP'] = str(args.startup)
+    os.environ['FAKE_BLENDER_RENDER'] = str(args.render)
+    modes = {'sequential': (1, 1), 'parallel': (args.workers, 1),
+             'batched': (args.workers, args.files_per_process)}
+    selected = [mode for mode in args.modes.split(',') if mode]
+
+    work_dir = tempfile.mkdtemp(prefix='fbx_bench_')
+    results = []
+    try:
+        blender = make_launcher(work_dir)
+        for size in (int(value) for value in args.sizes.split(',')):
+            for depth in (int(value) for value in args.depths.split(',')):
+                tree = os.path.join(work_dir, f'tree_{size}_{depth}')
+                make_tree(tree, size, depth)
+                result = {'files': size, 'depth': depth, 'discovery': bench_discovery(tree),
+                          'templating': bench_templating(list(iter_fbx_files(tree)), work_dir), 'modes': {}}
+                for mode in selected:
+                    output_dir = os.path.join(work_dir, f'out_{size}_{depth}_{mode}')
+                    os.makedirs(output_dir)
+                    workers, files_per_process = modes[mode]
+                    result['modes'][mode] = bench_mode(blender, tree, output_dir, workers, files_per_process,
+                                                       args.startup, args.render)
+                    stats = result['modes'][mode]
+                    print(f"{size:>7} files depth {depth} {mode:>10}: {stats['files_per_second']:8.1f} files/s "
+                          f"p50 {stats['latency_p50']:.3f}s p99 {stats['latency_p99']:.3f}s "
+                          f"overhead {stats['overhead_seconds']:.2f}s", file=sys.stderr)
+                results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+              'platform': platform.platform(), 'cpu_count': os.cpu_count(),
+              'config': {'startup': args.startup, 'render': args.render, 'workers': args.workers,
+                         'files_per_process': args.files_per_process},
+              'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
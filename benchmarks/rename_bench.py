@@ -0,0 +1,121 @@
+# Benchmarks the rename engine on synthetic folders. Files are created on tmpfs
+# (/dev/shm) when it exists so the numbers show the engine rather than the disk.
+# Each size runs in its own process so peak RSS belongs to that size alone.
+#
+#   python benchmarks/rename_bench.py --sizes 10000,100000,1000000 -o bench_rename.json
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rename_engine import IMAGE_EXTENSIONS, scan_images, plan_folder, RenameJournal, execute_plan, undo
+from image_sequences import NATURAL
+
+
+def make_folder(folder, files):
+    # Unpadded frame numbers in a shuffled creation order, so ordering has real work to do
+    os.makedirs(folder)
+    frames = list(range(1, files + 1))
+    random.Random(files).shuffle(frames)
+    for frame in frames:
+        os.close(os.open(os.path.join(folder, f'plate_v01.{frame}.exr'), os.O_CREAT | os.O_WRONLY, 0o644))
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def measure(function, trace):
+    # Time a call, and with `trace` also the peak Python heap it allocated
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - started
+    stats = {'seconds': elapsed}
+    if trace:
+        stats['peak_mb'] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return result, stats
+
+
+def bench_size(work_dir, files, order, trace):
+    folder = os.path.join(work_dir, f'folder_{files}')
+    started = time.perf_counter()
+    make_folder(folder, files)
+    result = {'files': files, 'order': order, 'create_seconds': time.perf_counter() - started}
+
+    names, result['scan'] = measure(
+        lambda: [name for chunk in scan_images(folder, IMAGE_EXTENSIONS) for name in chunk], trace)
+    plan, result['plan'] = measure(lambda: plan_folder(folder, names, 'shot', 'beauty', 7, order=order), trace)
+    result['plan']['steps'] = len(plan)
+
+    journal = RenameJournal.for_folder(folder)
+    journal.start(plan)
+    performed, result['execute'] = measure(lambda: execute_plan(plan, journal), trace)
+    _, result['undo'] = measure(lambda: undo(RenameJournal.for_folder(folder)), trace)
+    for phase in ('scan', 'plan', 'execute', 'undo'):
+        result[phase]['files_per_second'] = files / result[phase]['seconds'] if result[phase]['seconds'] else None
+    result['renamed'] = len(performed)
+    result['max_rss_mb'] = max_rss_mb()
+    shutil.rmtree(folder, ignore_errors=True)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scanning, planning and renaming large folders.")
+    parser.add_argument('--sizes', default='10000,100000', help="comma-separated file counts")
+    parser.add_argument('--order', default=NATURAL, help="numbering order passed to the planner")
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help="also record the peak Python heap per phase (slows every phase down)")
+    parser.add_argument('--dir', default='/dev/shm' if os.path.isdir('/dev/shm') else None,
+                        help="where the synthetic folders are created (default: /dev/shm)")
+    parser.add_argument('-o', '--output', default='bench_rename.json')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)  # one size, JSON on stdout
+    args = parser.parse_args(argv)
+
+    if args.single:
+        work_dir = tempfile.mkdtemp(prefix='rename_bench_', dir=args.dir)
+        try:
+            print(json.dumps(bench_size(work_dir, args.single, args.order, args.tracemalloc)))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return 0
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        command = [sys.executable, os.path.abspath(__file__), '--single', str(size), '--order', args.order]
+        command += ['--tracemalloc'] if args.tracemalloc else []
+        command += ['--dir', args.dir] if args.dir else []
+        result = json.loads(subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout)
+        print(f"{size:>9} files: scan {result['scan']['seconds']:.2f}s plan {result['plan']['seconds']:.2f}s "
+              f"execute {result['execute']['seconds']:.2f}s undo {result['undo']['seconds']:.2f}s "
+              f"peak rss {result['max_rss_mb'] or 0:.0f} MB", file=sys.stderr)
+        results.append(result)
+
+    report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+              'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'directory': args.dir,
+              'config': {'order': args.order, 'tracemalloc': args.tracemalloc}, 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,749 @@
+# Blender render helpers used by the FBX to Images tool
+import os
+import sys
+import json
+import argparse
+import itertools
+import fnmatch
+import hashlib
+import subprocess
+import time
+import threading
+import queue
+from collections import Counter
+
+# Per-file render outcomes
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+SKIPPED = 'skipped'
+
+# Everything that changes the rendered image; part of the render cache key
+DEFAULT_SETTINGS = {
+    'resolution': 600,
+    'lights': [['Key Light', [3, -3, 3], 1000],
+               ['Fill Light', [-3, -3, 3], 500],
+               ['Back Light', [0, 3, 3], 750]],
+    'camera_distance_factor': 1.5,
+}
+
+# Elevation of the default three-quarter camera, which sits at (d, d, d)
+DEFAULT_ELEVATION = 35.264
+
+MANIFEST_NAME = '.fbx_render_manifest.jsonl'
+
+
+def _matches(patterns, relative_path, name):
+    # Globs are matched case-insensitively against the name and the path relative to the root
+    relative_path = relative_path.replace(os.sep, '/').lower()
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relative_path, pattern)
+               for pattern in patterns)
+
+
+def iter_fbx_files(directory, include=None, exclude=None, max_depth=None, extensions=('.fbx',)):
+    # Yields FBX paths as soon as they are found. max_depth=0 only looks at `directory` itself.
+    include = [pattern.lower() for pattern in include or []]
+    exclude = [pattern.lower() for pattern in exclude or []]
+    extensions = tuple(extension.lower() for extension in extensions)
+
+    stack = [(directory, '', 0)]
+    while stack:
+        path, relative_dir, depth = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                subdirectories = []
+                for entry in entries:
+                    relative_path = os.path.join(relative_dir, entry.name)
+                    if exclude and _matches(exclude, relative_path, entry.name):
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if max_depth is None or depth < max_depth:
+                            subdirectories.append((entry.path, relative_path, depth + 1))
+                    elif entry.name.lower().endswith(extensions):
+                        if not include or _matches(include, relative_path, entry.name):
+                            yield entry.path
+        except OSError:
+            # Unreadable directories are skipped, like os.walk does
+            continue
+        # Reversed so directories are visited in listing order
+        stack.extend(reversed(subdirectories))
+
+
+def find_fbx_files(directory, include=None, exclude=None, max_depth=None):
+    return list(iter_fbx_files(directory, include, exclude, max_depth))
+
+
+def turntable_views(count, elevation=DEFAULT_ELEVATION, start=45.0):
+    # Evenly spaced [azimuth, elevation] pairs; the first one matches the single-view camera
+    return [[round((start + 360.0 * i / count) % 360.0, 3), elevation] for i in range(count)]
+
+
+def multi_view_settings(views, atlas_columns=0, settings=None):
+    # Multi-view output: <name>_viewNNN.png frames plus a <name>.png atlas and <name>.json index.
+    # The extra keys are only present in multi-view mode so single-view cache keys stay unchanged.
+    return dict(settings or DEFAULT_SETTINGS, views=views, atlas_columns=atlas_columns)
+
+
+# Blender-side program. The host prepends a JOB dict; in batch mode the process
+# stays alive and renders one FBX per JSON line read from stdin.
+BLENDER_SCRIPT = """
+import os
+import sys
+import json
+import math
+import time
+import bpy
+from mathutils import Vector
+
+RESULT_MARKER = '@@FBX_RESULT '
+PHASES_MARKER = '@@FBX_PHASES '
+SETTINGS = JOB['settings']
+
+class PhaseTimer:
+    # Each call charges the time since the previous call to the named phase
+    def __init__(self):
+        self.phases = {'import': 0.0, 'scene_setup': 0.0, 'render': 0.0, 'save': 0.0}
+        self.last = time.perf_counter()
+
+    def __call__(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] += now - self.last
+        self.last = now
+
+def point_camera(camera, target_location):
+    direction = (Vector(target_location) - camera.location).normalized()
+    camera.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
+
+def pack_atlas(frames, output_file, timer):
+    # Lay the frames out on a grid; Blender stores pixel rows bottom-up, the JSON index uses top-left origins
+    import numpy
+
+    first = bpy.data.images.load(frames[0][0])
+    width, height = first.size
+    bpy.data.images.remove(first)
+    columns = SETTINGS.get('atlas_columns') or math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    atlas = numpy.zeros((rows * height, columns * width, 4), dtype=numpy.float32)
+
+    index = []
+    for i, (frame_file, azimuth, elevation) in enumerate(frames):
+        image = bpy.data.images.load(frame_file)
+        pixels = numpy.empty(width * height * 4, dtype=numpy.float32)
+        image.pixels.foreach_get(pixels)
+        bpy.data.images.remove(image)
+
+        x = (i % columns) * width
+        y = (i // columns) * height
+        bottom = rows * height - y - height
+        atlas[bottom:bottom + height, x:x + width] = pixels.reshape(height, width, 4)
+        index.append({'index': i, 'file': os.path.basename(frame_file), 'azimuth': azimuth,
+                      'elevation': elevation, 'x': x, 'y': y, 'w': width, 'h': height})
+
+    image = bpy.data.images.new('Atlas', columns * width, rows * height, alpha=True)
+    image.pixels.foreach_set(atlas.ravel())
+    image.filepath_raw = output_file
+    image.file_format = 'PNG'
+    image.save()
+    bpy.data.images.remove(image)
+
+    with open(os.path.splitext(output_file)[0] + '.json', 'w') as file:
+        json.dump({'image': os.path.basename(output_file), 'width': columns * width, 'height': rows * height,
+                   'columns': columns, 'rows': rows, 'frames': index}, file, indent=2)
+    timer('save')
+
+def render_views(camera, target_obj, camera_distance, output_file, timer):
+    # Orbit the one camera around the already imported and lit asset
+    radius = camera_distance * math.sqrt(3)
+    base = os.path.splitext(output_file)[0]
+    frames = []
+    for i, (azimuth, elevation) in enumerate(SETTINGS['views']):
+        a, e = math.radians(azimuth), math.radians(elevation)
+        camera.location = (radius * math.cos(e) * math.cos(a), radius * math.cos(e) * math.sin(a),
+                           radius * math.sin(e))
+        point_camera(camera, target_obj.location)
+        timer('scene_setup')
+
+        frame_file = f'{base}_view{i:03d}.png'
+        bpy.ops.render.render()
+        timer('render')
+        bpy.data.images['Render Result'].save_render(filepath=frame_file)
+        timer('save')
+        frames.append((frame_file, azimuth, elevation))
+    pack_atlas(frames, output_file, timer)
+
+def render_file(fbx_file, output_file, timer):
+    camera = None
+
+    # Delete default objects
+    bpy.ops.object.select_all(action='SELECT')
+    bpy.ops.object.delete()
+    timer('scene_setup')
+
+    # Load the FBX file
+    bpy.ops.import_scene.fbx(filepath=fbx_file)
+    timer('import')
+
+    # Add 3-point lighting
+    def add_light(name, location, energy):
+        bpy.ops.object.light_add(type='POINT', location=location)
+        light = bpy.context.object
+        light.data.energy = energy
+        light.name = name
+
+    for name, location, energy in SETTINGS['lights']:
+        add_light(name, tuple(location), energy)
+
+    # Find the bounding box of the imported object
+    imported_objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH']
+    if imported_objects:
+        # Assume first object is the target
+        target_obj = imported_objects[0]
+        bpy.context.view_layer.objects.active = target_obj
+        bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
+
+        # Calculate the dimensions and position the camera
+        dims = target_obj.dimensions
+        max_dim = max(dims)
+        target_obj.location = (0, 0, 0)
+
+        # Create and position camera
+        camera_distance = max_dim * SETTINGS['camera_distance_factor']
+        bpy.ops.object.camera_add(location=(camera_distance, camera_distance, camera_distance))
+        camera = bpy.context.object
+        camera.data.type = 'PERSP'
+        camera.data.lens = 50  # Standard lens focal length
+
+        # Point the camera to the object
+        direction = (Vector(target_obj.location) - camera.location).normalized()
+        rot_quat = direction.to_track_quat('-Z', 'Y')
+        camera.rotation_euler = rot_quat.to_euler()
+
+        # Set the camera as the active camera
+        bpy.context.scene.camera = camera
+
+    # Render settings
+    bpy.context.scene.render.image_settings.file_format = 'PNG'
+    bpy.context.scene.render.resolution_x = SETTINGS['resolution']
+    bpy.context.scene.render.resolution_y = SETTINGS['resolution']
+    timer('scene_setup')
+
+    if SETTINGS.get('views') and camera is not None:
+        render_views(camera, target_obj, camera_distance, output_file, timer)
+        return
+
+    # Render the scene
+    bpy.ops.render.render(write_still=True)
+    timer('render')
+    bpy.data.images['Render Result'].save_render(filepath=output_file)
+    timer('save')
+
+if JOB['batch']:
+    while True:
+        line = sys.stdin.readline()
+        if not line:
+            break
+        fbx_file, output_file = json.loads(line)
+        timer = PhaseTimer()
+        # Reload the startup file so every asset starts from the same scene as a fresh launch
+        bpy.ops.wm.read_homefile()
+        try:
+            render_file(fbx_file, output_file, timer)
+            result = [fbx_file, 'ok', None, timer.phases]
+        except Exception as e:
+            result = [fbx_file, 'error', repr(e), timer.phases]
+        print(RESULT_MARKER + json.dumps(result), flush=True)
+else:
+    timer = PhaseTimer()
+    render_file(JOB['fbx_file'], JOB['output_file'], timer)
+    print(PHASES_MARKER + json.dumps(timer.phases), flush=True)
+"""
+
+RESULT_MARKER = '@@FBX_RESULT '
+PHASES_MARKER = '@@FBX_PHASES '
+
+
+def output_path(fbx_file, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(fbx_file))[0] + '.png')
+
+
+def build_blender_script(job):
+    # repr() of the JSON text is a valid Python literal whatever the paths contain
+    return f"import json\nJOB = json.loads({json.dumps(job)!r})\n" + BLENDER_SCRIPT
+
+
+def build_single_script(fbx_file, output_dir, settings=None):
+    return build_blender_script({'batch': False, 'settings': settings or DEFAULT_SETTINGS,
+                                 'fbx_file': fbx_file, 'output_file': output_path(fbx_file, output_dir)})
+
+
+def blender_command(blender_path, blender_script):
+    # --python-exit-code makes a failing script show up as a non-zero exit code
+    return [blender_path, '--background', '--python-exit-code', '1', '--python-expr', blender_script]
+
+
+def render_fbx_to_png(fbx_file, output_dir, blender_path, timeout=None, settings=None):
+    blender_script = build_single_script(fbx_file, output_dir, settings)
+    return subprocess.run(blender_command(blender_path, blender_script), timeout=timeout).returncode
+
+
+def blender_version(blender_path):
+    try:
+        output = subprocess.run([blender_path, '--version'], capture_output=True, text=True,
+                                errors='replace', timeout=60).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    lines = output.strip().splitlines()
+    return lines[0] if lines else None
+
+
+def settings_key(settings, version):
+    text = json.dumps([settings, version], sort_keys=True)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def hash_file(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    # Append-only manifest in the output directory: one JSON line per rendered file.
+    # Later lines win and a torn last line is ignored, so an interrupted run keeps
+    # everything it finished.
+    def __init__(self, output_dir, key):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.key = key
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._file = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['fbx']] = entry
+        except FileNotFoundError:
+            pass
+
+    def check(self, fbx_file, png_file):
+        # Returns (is_current, entry); the entry is what record() stores after a render
+        fbx_file = os.path.abspath(fbx_file)
+        stat = os.stat(fbx_file)
+        with self._lock:
+            previous = self.entries.get(fbx_file)
+
+        # Fast path: unchanged size and mtime reuse the stored content hash
+        if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            content_hash = previous['hash']
+        else:
+            content_hash = hash_file(fbx_file)
+
+        entry = {'fbx': fbx_file, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                 'hash': content_hash, 'key': self.key, 'png': os.path.basename(png_file)}
+        is_current = (previous is not None and previous['hash'] == content_hash
+                      and previous['key'] == self.key and os.path.exists(png_file))
+        if is_current and previous['mtime_ns'] != stat.st_mtime_ns:
+            # Touched but identical; remember the new mtime so the fast path hits next time
+            self.record(entry)
+        return is_current, entry
+
+    def record(self, entry):
+        with self._lock:
+            self.entries[entry['fbx']] = entry
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self):
+        # Rewrite the manifest with one line per file
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            temp_path = self.path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for entry in self.entries.values():
+                    file.write(json.dumps(entry) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temp_path, self.path)
+
+
+class BlenderWorker:
+    # One background Blender process that renders many FBX files sent over stdin.
+    # The process is recycled after `max_files` renders to cap memory growth.
+    def __init__(self, blender_path, max_files=25, settings=None):
+        self.blender_path = blender_path
+        self.max_files = max(1, max_files)
+        self.settings = settings or DEFAULT_SETTINGS
+        self.process = None
+        self.rendered = 0
+        self._results = None
+        self._lock = threading.Lock()  # guards swapping `process`, which kill() reads from other threads
+
+    def render(self, fbx_file, output_file, timeout=None):
+        # Returns (status, error, exit_code, phases); exit_code is only set when Blender died
+        if self.process is not None and self.rendered >= self.max_files:
+            self.close()
+        if self.process is None:
+            self._launch()
+
+        try:
+            self.process.stdin.write(json.dumps([fbx_file, output_file]) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            returncode = self._discard()
+            return FAILED, f"Blender exited with code {returncode}", returncode, None
+
+        try:
+            result = self._results.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            self._discard()
+            return TIMEOUT, f"Timed out after {timeout} seconds", None, None
+        if result is None:
+            returncode = self._discard()
+            return FAILED, f"Blender exited with code {returncode}", returncode, None
+
+        self.rendered += 1
+        _, outcome, error, phases = result
+        if outcome != 'ok':
+            return FAILED, error, None, phases
+        return DONE, None, None, phases
+
+    def close(self):
+        # Closing stdin ends the batch loop and lets Blender exit normally
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        with self._lock:
+            self.process = None
+
+    def kill(self):
+        # Safe from any thread (Cancel); the rendering thread notices the dead process and discards it
+        with self._lock:
+            process = self.process
+        if process is not None:
+            process.kill()
+
+    def _launch(self):
+        blender_script = build_blender_script({'batch': True, 'settings': self.settings})
+        process = subprocess.Popen(blender_command(self.blender_path, blender_script),
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, errors='replace', bufsize=1)
+        with self._lock:
+            self.process = process
+        self.rendered = 0
+        self._results = queue.Queue()
+        threading.Thread(target=self._read_output, args=(process, self._results), daemon=True).start()
+
+    def _read_output(self, process, results):
+        # Blender's own log goes to the same pipe; only marker lines are results
+        for line in process.stdout:
+            if line.startswith(RESULT_MARKER):
+                results.put(json.loads(line[len(RESULT_MARKER):]))
+        results.put(None)
+
+    def _discard(self):
+        with self._lock:
+            process, self.process = self.process, None
+        if process is None:
+            return None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        return process.wait()
+
+
+class RenderPool:
+    # Runs up to `workers` Blender processes at once on background threads.
+    # Progress is read from `counts` / `results`, so a GUI can poll it without blocking.
+    # With files_per_process > 1 each worker keeps a BlenderWorker alive between files.
+    # With use_cache, files whose manifest entry matches are skipped unless force is set.
+    def __init__(self, blender_path, output_dir, workers=None, timeout=None, files_per_process=1,
+                 settings=None, use_cache=True, force=False, on_result=None):
+        self.blender_path = blender_path
+        self.output_dir = output_dir
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.files_per_process = max(1, files_per_process)
+        self.settings = settings or DEFAULT_SETTINGS
+        self.use_cache = use_cache
+        self.force = force
+        self.cache = None
+        self.on_result = on_result
+
+        self.results = {}  # fbx file -> outcome
+        self.errors = {}  # fbx file -> error message for failed files
+        self.counts = Counter()
+        self.discovered = 0
+        self.started = 0
+        self.discovering = False
+        self.finished = threading.Event()
+
+        self._jobs = queue.Queue()
+        self._cancelled = threading.Event()
+        self._processes = set()
+        self._batch_workers = set()
+        self._lock = threading.Lock()
+        self._live_workers = 0
+
+    def start(self, fbx_files):
+        # fbx_files may be any iterable; it is consumed on a background thread
+        self._live_workers = self.workers
+        self.discovering = True
+        threading.Thread(target=self._feed, args=(fbx_files,), daemon=True).start()
+        for _ in range(self.workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def cancel(self):
+        self._cancelled.set()
+        with self._lock:
+            for process in self._processes:
+                process.kill()
+            for worker in self._batch_workers:
+                worker.kill()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def waiting(self):
+        # Files found but not yet picked up by a worker
+        return self.discovered - self.started
+
+    def snapshot(self):
+        # Copy of the outcome counts that is safe to read while workers update them
+        with self._lock:
+            return Counter(self.counts)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def _feed(self, fbx_files):
+        try:
+            if self.use_cache:
+                # Asking Blender for its version is a process launch, so do it off the GUI thread
+                key = settings_key(self.settings, blender_version(self.blender_path))
+                self.cache = RenderCache(self.output_dir, key)
+            for fbx_file in fbx_files:
+                if self._cancelled.is_set():
+                    break
+                with self._lock:
+                    self.discovered += 1
+                self._jobs.put(fbx_file)
+        finally:
+            self.discovering = False
+            for _ in range(self.workers):
+                self._jobs.put(None)
+
+    def _work(self):
+        batch_worker = None
+        if self.files_per_process > 1:
+            batch_worker = BlenderWorker(self.blender_path, self.files_per_process, self.settings)
+            with self._lock:
+                self._batch_workers.add(batch_worker)
+
+        try:
+            while True:
+                fbx_file = self._jobs.get()
+                if fbx_file is None:
+                    break
+                with self._lock:
+                    self.started += 1
+                self._process(fbx_file, batch_worker)
+        except Exception:
+            # A broken worker must not leave the batch hanging; stop everything instead
+            self.cancel()
+            raise
+        finally:
+            if batch_worker is not None:
+                batch_worker.close()
+                with self._lock:
+                    self._batch_workers.discard(batch_worker)
+
+            with self._lock:
+                self._live_workers -= 1
+                last = self._live_workers == 0
+            if last:
+                # finished is set even if the manifest cannot be written, or wait() never returns
+                try:
+                    if self.cache is not None:
+                        self.cache.close()
+                finally:
+                    self.finished.set()
+
+    def _process(self, fbx_file, batch_worker):
+        if self._cancelled.is_set():
+            self._record(fbx_file, CANCELLED)
+            return
+
+        started = time.perf_counter()
+        entry = None
+        if self.cache is not None:
+            try:
+                is_current, entry = self.cache.check(fbx_file, output_path(fbx_file, self.output_dir))
+            except OSError as e:
+                self._record(fbx_file, FAILED, str(e))
+                return
+            if is_current and not self.force:
+                self._record(fbx_file, SKIPPED, wall_time=time.perf_counter() - started)
+                return
+
+        if batch_worker is not None:
+            status, error, exit_code, phases = self._render_batched(batch_worker, fbx_file)
+        else:
+            status, error, exit_code, phases = self._render(fbx_file)
+        if status == DONE and entry is not None:
+            self.cache.record(entry)
+        self._record(fbx_file, status, error, time.perf_counter() - started, exit_code, phases)
+
+    def _render_batched(self, batch_worker, fbx_file):
+        try:
+            outcome = batch_worker.render(fbx_file, output_path(fbx_file, self.output_dir), self.timeout)
+        except OSError as e:
+            return FAILED, str(e), None, None
+        if outcome[0] != DONE and self._cancelled.is_set():
+            return CANCELLED, None, None, None
+        return outcome
+
+    def _render(self, fbx_file):
+        blender_script = build_single_script(fbx_file, self.output_dir, self.settings)
+        try:
+            process = subprocess.Popen(blender_command(self.blender_path, blender_script),
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       text=True, errors='replace')
+        except OSError as e:
+            return FAILED, str(e), None, None
+
+        with self._lock:
+            self._processes.add(process)
+            if self._cancelled.is_set():
+                process.kill()
+        try:
+            output, _ = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            return TIMEOUT, f"Timed out after {self.timeout} seconds", None, None
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+
+        phases = None
+        for line in output.splitlines():
+            if line.startswith(PHASES_MARKER):
+                phases = json.loads(line[len(PHASES_MARKER):])
+
+        if self._cancelled.is_set():
+            return CANCELLED, None, process.returncode, phases
+        if process.returncode != 0:
+            return FAILED, f"Blender exited with code {process.returncode}", process.returncode, phases
+        return DONE, None, process.returncode, phases
+
+    def _record(self, fbx_file, status, error=None, wall_time=None, exit_code=None, phases=None):
+        png_file = output_path(fbx_file, self.output_dir)
+        try:
+            output_size = os.path.getsize(png_file) if status in (DONE, SKIPPED) else None
+        except OSError:
+            output_size = None
+        record = {'fbx': fbx_file, 'png': png_file, 'status': status, 'error': error,
+                  'wall_time': wall_time, 'exit_code': exit_code, 'output_size': output_size,
+                  'phases': phases}
+
+        with self._lock:
+            self.results[fbx_file] = status
+            self.counts[status] += 1
+            if error:
+                self.errors[fbx_file] = error
+        if self.on_result:
+            self.on_result(record)
+
+
+def main(argv=None):
+    # Headless entry point: renders every FBX under the given directories and writes
+    # one JSON line per file to the report
+    parser = argparse.ArgumentParser(description="Render FBX files to PNG thumbnails with Blender.")
+    parser.add_argument('directories', nargs='+', help="directories to search for FBX files")
+    parser.add_argument('-o', '--output', required=True, help="directory for the rendered PNG files")
+    parser.add_argument('-b', '--blender', default='blender', help="Blender executable (default: blender)")
+    parser.add_argument('-r', '--resolution', type=int, default=DEFAULT_SETTINGS['resolution'])
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="parallel Blender processes (default: CPU count)")
+    parser.add_argument('--files-per-process', type=int, default=1,
+                        help="FBX files rendered by one Blender process before it is recycled")
+    parser.add_argument('--timeout', type=float, default=None, help="per-file timeout in seconds")
+    parser.add_argument('--views', type=int, default=1, help="turntable views per asset")
+    parser.add_argument('--atlas-columns', type=int, default=0)
+    parser.add_argument('--include', action='append', default=[], help="glob of files to render")
+    parser.add_argument('--exclude', action='append', default=[], help="glob of files or folders to skip")
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="re-render files the cache says are up to date")
+    parser.add_argument('--no-cache', action='store_true', help="do not read or write the render manifest")
+    parser.add_argument('--report', default='-', help="JSON Lines report path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    settings = dict(DEFAULT_SETTINGS, resolution=args.resolution)
+    if args.views > 1:
+        settings = multi_view_settings(turntable_views(args.views), args.atlas_columns, settings)
+    os.makedirs(args.output, exist_ok=True)
+
+    report = sys.stdout if args.report == '-' else open(args.report, 'w', encoding='utf-8')
+    report_lock = threading.Lock()
+
+    def write_record(record):
+        with report_lock:
+            try:
+                report.write(json.dumps(record) + "\n")
+                report.flush()
+            except BrokenPipeError:
+                # The reader went away (e.g. piped into head); stop rendering
+                pool.cancel()
+
+    pool = RenderPool(args.blender, args.output, workers=args.workers, timeout=args.timeout,
+                      files_per_process=args.files_per_process, settings=settings,
+                      use_cache=not args.no_cache, force=args.force, on_result=write_record)
+    started = time.perf_counter()
+    pool.start(itertools.chain.from_iterable(
+        iter_fbx_files(directory, args.include, args.exclude, args.max_depth) for directory in args.directories))
+    try:
+        while not pool.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pool.cancel()
+        pool.wait()
+    finally:
+        if report is not sys.stdout:
+            report.close()
+
+    counts = pool.snapshot()
+    print(f"{pool.discovered} files in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())),
+          file=sys.stderr)
+    return 1 if counts[FAILED] or counts[TIMEOUT] or pool.cancelled else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
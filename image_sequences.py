@@ -0,0 +1,269 @@
+# Image-sequence detection and rename ordering for the Batch Rename Tool (no Qt needed)
+import os
+import re
+import struct
+import calendar
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+NATURAL = 'natural'
+FRAME = 'frame'
+CAPTURE = 'capture'
+ORDERS = (NATURAL, FRAME, CAPTURE)
+
+_DIGITS = re.compile(r'(\d+)')
+# The last run of digits in the stem: 'name.0001', 'name_v02_0001', 'shot10'
+_FRAME = re.compile(r'^(?P<head>(?:.*\D)?)(?P<frame>\d+)(?P<tail>\D*)$')
+
+HEADER_BYTES = 256 * 1024  # capture times are looked for this far into a file
+
+
+def natural_key(name):
+    # 'f2' sorts before 'f10'. re.split puts text at even and numbers at odd
+    # positions, so two keys always compare like with like.
+    parts = _DIGITS.split(name)
+    return tuple(int(part) if i % 2 else part.lower() for i, part in enumerate(parts))
+
+
+def split_frame(name):
+    # (head, frame digits, tail, extension) for a name with a frame number, else None
+    stem, extension = os.path.splitext(name)
+    match = _FRAME.match(stem)
+    if match is None:
+        return None
+    return match.group('head'), match.group('frame'), match.group('tail'), extension
+
+
+class ImageSequence:
+    # Files that differ only by frame number, e.g. shot.0001.exr .. shot.0240.exr
+    def __init__(self, head, tail, extension, frames):
+        self.head = head
+        self.tail = tail
+        self.extension = extension
+        self.frames = sorted(frames)  # (frame number, name)
+        # Worked out once: ordering asks for it for every frame
+        width = min(len(os.path.splitext(name)[0]) for _, name in self.frames) - len(head) - len(tail)
+        self.pattern = f"{head}{'#' * width}{tail}{extension}"
+
+    @property
+    def first(self):
+        return self.frames[0][0]
+
+    @property
+    def last(self):
+        return self.frames[-1][0]
+
+    @property
+    def missing(self):
+        # Frame numbers absent between the first and last frame
+        return self.last - self.first + 1 - len({frame for frame, _ in self.frames})
+
+    @property
+    def names(self):
+        return [name for _, name in self.frames]
+
+    def __len__(self):
+        return len(self.frames)
+
+
+def find_sequences(names):
+    # Groups names by everything but their frame number. Returns (sequences, singles);
+    # a pattern that matches a single file is not a sequence.
+    groups = {}
+    singles = []
+    for name in names:
+        parts = split_frame(name)
+        if parts is None:
+            singles.append(name)
+            continue
+        head, frame, tail, extension = parts
+        groups.setdefault((head, tail, extension.lower()), []).append((int(frame), name))
+    sequences = []
+    for (head, tail, _), frames in groups.items():
+        if len(frames) > 1:
+            sequences.append(ImageSequence(head, tail, os.path.splitext(frames[0][1])[1], frames))
+        else:
+            singles.append(frames[0][1])
+    sequences.sort(key=lambda sequence: natural_key(sequence.pattern))
+    singles.sort(key=natural_key)
+    return sequences, singles
+
+
+def _parse_exif_time(text):
+    # 'YYYY:MM:DD HH:MM:SS' as seconds. EXIF has no time zone, so the value is only
+    # good for ordering against other capture times.
+    try:
+        date, clock = text.strip('\x00 ').split(' ')
+        year, month, day = (int(value) for value in date.split(':'))
+        hour, minute, second = (int(float(value)) for value in clock.split(':'))
+        return float(calendar.timegm((year, month, day, hour, minute, second)))
+    except (ValueError, OverflowError):
+        return None
+
+
+def _tiff_capture_time(data):
+    # DateTimeOriginal from the Exif IFD, falling back to IFD0's DateTime
+    if data[:2] == b'II':
+        order = '<'
+    elif data[:2] == b'MM':
+        order = '>'
+    else:
+        return None
+
+    def entries(offset):
+        if offset + 2 > len(data):
+            return {}
+        count, = struct.unpack_from(order + 'H', data, offset)
+        tags = {}
+        for i in range(count):
+            entry = offset + 2 + i * 12
+            if entry + 12 > len(data):
+                break
+            tag, kind, length, value = struct.unpack_from(order + 'HHII', data, entry)
+            tags[tag] = (kind, length, value, entry + 8)
+        return tags
+
+    def text(tag):
+        kind, length, value, inline = tag
+        start = inline if length <= 4 else value
+        if kind != 2 or start + length > len(data):
+            return None
+        return _parse_exif_time(data[start:start + length].decode('ascii', 'replace'))
+
+    try:
+        ifd0 = entries(struct.unpack_from(order + 'I', data, 4)[0])
+        if 0x8769 in ifd0:
+            exif = entries(ifd0[0x8769][2])
+            for tag in (0x9003, 0x9004):  # DateTimeOriginal, DateTimeDigitized
+                if tag in exif and text(exif[tag]) is not None:
+                    return text(exif[tag])
+        if 0x0132 in ifd0:
+            return text(ifd0[0x0132])
+    except struct.error:
+        pass
+    return None
+
+
+def _jpeg_capture_time(data):
+    position = 2
+    while position + 4 <= len(data) and data[position] == 0xFF:
+        marker = data[position + 1]
+        if marker in (0xD9, 0xDA):  # end of image, start of scan
+            break
+        length, = struct.unpack_from('>H', data, position + 2)
+        if marker == 0xE1 and data[position + 4:position + 10] == b'Exif\x00\x00':
+            return _tiff_capture_time(data[position + 10:position + 2 + length])
+        position += 2 + length
+    return None
+
+
+def _png_capture_time(data):
+    position = 8
+    while position + 8 <= len(data):
+        length, kind = struct.unpack_from('>I4s', data, position)
+        if kind == b'eXIf':
+            return _tiff_capture_time(data[position + 8:position + 8 + length])
+        if kind == b'IDAT':
+            break
+        position += 12 + length
+    return None
+
+
+def _webp_capture_time(data):
+    position = 12
+    while position + 8 <= len(data):
+        kind, length = struct.unpack_from('<4sI', data, position)
+        if kind == b'EXIF':
+            chunk = data[position + 8:position + 8 + length]
+            return _tiff_capture_time(chunk[6:] if chunk.startswith(b'Exif\x00\x00') else chunk)
+        position += 8 + length + (length & 1)
+    return None
+
+
+def _exr_capture_time(data):
+    # Header attributes are name\0 type\0 size value, ended by an empty name
+    position = 8
+    while position < len(data) and data[position]:
+        name_end = data.find(b'\x00', position)
+        type_end = data.find(b'\x00', name_end + 1)
+        if name_end < 0 or type_end < 0 or type_end + 4 > len(data):
+            break
+        size, = struct.unpack_from('<i', data, type_end + 1)
+        if size < 0:
+            break  # a damaged header; a negative size would walk backwards forever
+        if data[position:name_end] == b'capDate':
+            value = data[type_end + 5:type_end + 5 + size]
+            return _parse_exif_time(value.decode('ascii', 'replace'))
+        position = type_end + 5 + size
+    return None
+
+
+def read_capture_time(path):
+    # Capture time from the image header, or None when the file has none we can read
+    with open(path, 'rb') as file:
+        data = file.read(HEADER_BYTES)
+    if data.startswith(b'\xff\xd8'):
+        return _jpeg_capture_time(data)
+    if data.startswith((b'II*\x00', b'MM\x00*')):
+        return _tiff_capture_time(data)
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return _png_capture_time(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_capture_time(data)
+    if data.startswith(b'\x76\x2f\x31\x01'):
+        return _exr_capture_time(data)
+    return None
+
+
+class HeaderCache:
+    # Capture times keyed by path and checked against size and mtime, so sorting the
+    # same folder again costs a stat per file instead of a header read
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def capture_time(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            return entry[2]
+        try:
+            value = read_capture_time(path)
+        except (OSError, struct.error, ValueError):  # unreadable or damaged header
+            return None
+        with self.lock:
+            self.entries[path] = (stat.st_size, stat.st_mtime_ns, value)
+        return value
+
+    def capture_times(self, folder, names, workers=8):
+        paths = [os.path.join(folder, name) for name in names]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(names, executor.map(self.capture_time, paths, chunksize=256)))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def order_names(folder, names, order=NATURAL, cache=None):
+    # The order files are numbered in. FRAME keeps each sequence together in frame
+    # order; CAPTURE puts files without a capture time last, in natural order.
+    if order == NATURAL:
+        return sorted(names, key=natural_key)
+    if order == FRAME:
+        sequences, singles = find_sequences(names)
+        keyed = []
+        for sequence in sequences:
+            pattern_key = natural_key(sequence.pattern)
+            keyed.extend(((pattern_key, frame), name) for frame, name in sequence.frames)
+        keyed.extend(((natural_key(name), -1), name) for name in singles)
+        keyed.sort(key=lambda item: item[0])
+        return [name for _, name in keyed]
+    if order == CAPTURE:
+        times = (cache or HeaderCache()).capture_times(folder, names)
+        return sorted(names, key=lambda name: (times[name] is None, times[name] or 0.0, natural_key(name)))
+    raise ValueError(f"Unknown order {order!r}, expected one of {', '.join(ORDERS)}")
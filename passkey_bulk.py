@@ -0,0 +1,202 @@
+# Bulk CSV import and export for PassKey (no Qt needed).
+#
+# Import reads the CSV a line at a time, encrypts rows in batches on a thread pool
+# and adds everything to the vault in a single commit at the end, so an import that
+# fails or is cancelled halfway leaves the vault as it was. Understood layouts:
+#
+#   PassKey: account, username, password, codes
+#   Chrome:  name, url, username, password[, note]
+#   Firefox: url, username, password, httpRealm, formActionOrigin, guid, ...
+import os
+import csv
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+PASSKEY_COLUMNS = ['account', 'username', 'password', 'codes']
+
+
+class CsvFormatError(Exception):
+    pass
+
+
+def _host(url):
+    host = urlsplit(url if '//' in url else '//' + url).hostname or url
+    return host[4:] if host.startswith('www.') else host
+
+
+def _row_reader(header):
+    # A function turning a CSV row (dict) into (account, username, password, codes)
+    columns = {column.strip().lower() for column in header}
+    if {'account', 'username', 'password'} <= columns:
+        return lambda row: (row['account'], row['username'], row['password'], row.get('codes') or '')
+    if {'name', 'url', 'username', 'password'} <= columns:  # Chrome
+        return lambda row: (row['name'] or _host(row['url']), row['username'], row['password'],
+                            row.get('note') or '')
+    if {'url', 'username', 'password'} <= columns:  # Firefox
+        return lambda row: (_host(row['url']), row['username'], row['password'], '')
+    raise CsvFormatError("Unrecognised CSV header: " + ", ".join(header))
+
+
+def _counted_lines(file, counter):
+    # Passes lines on to csv.reader while keeping count of the characters read
+    for line in file:
+        counter[0] += len(line)
+        yield line
+
+
+def _encrypt_batch(cipher, batch):
+    results = []
+    for line, (account, username, password, codes) in batch:
+        try:
+            results.append((line, (account, username, cipher.encrypt(password.encode()).decode(),
+                                   cipher.encrypt(codes.encode()).decode()), None))
+        except Exception as e:  # reported per row, the rest of the batch carries on
+            results.append((line, None, str(e)))
+    return results
+
+
+def import_csv(path, vault, cipher, batch_size=500, workers=4, progress=None, should_stop=None):
+    # Returns a report: imported, errors [(line, message)], cancelled and seconds.
+    # progress(done, total) is called with characters read out of the file size.
+    started = time.perf_counter()
+    total = os.path.getsize(path)
+    counter = [0]
+    records = {}
+    errors = []
+    cancelled = False
+
+    def collect(results):
+        for line, record, error in results:
+            if error is not None:
+                errors.append((line, error))
+            else:
+                records[record[:2]] = (line, record)  # a later row for the same entry wins
+
+    with open(path, newline='', encoding='utf-8-sig') as file, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        rows = csv.DictReader(_counted_lines(file, counter))
+        if rows.fieldnames is None:
+            raise CsvFormatError(f"{path} is empty")
+        rows.fieldnames = [column.strip().lower() for column in rows.fieldnames]
+        read = _row_reader(rows.fieldnames)
+
+        pending = []
+        batch = []
+        for row in rows:
+            line = rows.line_num
+            if None in row or any(value is None for value in row.values()):
+                errors.append((line, "wrong number of columns"))
+                continue
+            try:
+                account, username, password, codes = read(row)
+            except KeyError as e:
+                errors.append((line, f"missing column {e}"))
+                continue
+            # Names are tidied up; passwords and codes are kept exactly as written
+            account, username = account.strip(), username.strip()
+            if not account or not username or not password:
+                errors.append((line, "account, username and password are required"))
+                continue
+            batch.append((line, (account, username, password, codes)))
+            if len(batch) >= batch_size:
+                pending.append(pool.submit(_encrypt_batch, cipher, batch))
+                batch = []
+                # Keep a few batches in flight so memory stays bounded on huge files
+                while len(pending) > 2 * workers:
+                    collect(pending.pop(0).result())
+                if progress is not None:
+                    progress(counter[0], total)
+                if should_stop is not None and should_stop():
+                    cancelled = True
+                    break
+        if batch and not cancelled:
+            pending.append(pool.submit(_encrypt_batch, cipher, batch))
+        for future in pending:
+            collect(future.result())
+
+    imported = 0
+    if records and not cancelled:
+        vault.put_many(record for _, record in sorted(records.values()))
+        imported = len(records)
+    if progress is not None:
+        progress(total, total)
+    return {'imported': imported, 'errors': sorted(errors), 'cancelled': cancelled,
+            'seconds': time.perf_counter() - started}
+
+
+def write_error_report(path, errors):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['line', 'error'])
+        writer.writerows(errors)
+
+
+def _decrypt_batch(cipher, vault, keys):
+    rows = []
+    for account, username in keys:
+        try:
+            record = vault.get(account, username)
+            rows.append((account, username,
+                         cipher.decrypt(record['password'].encode()).decode() if record['password'] else '',
+                         cipher.decrypt(record['codes'].encode()).decode() if record['codes'] else '', None))
+        except Exception as e:
+            rows.append((account, username, None, None, str(e)))
+    return rows
+
+
+def export_csv(path, vault, cipher, batch_size=500, workers=4, progress=None, should_stop=None):
+    # Writes every entry in PassKey's own layout. The output holds plain-text
+    # passwords, so only the user can read it; it is written to a temporary file and
+    # moved into place when complete.
+    started = time.perf_counter()
+    keys = vault.entries()
+    batches = iter([keys[i:i + batch_size] for i in range(0, len(keys), batch_size)])
+    temporary = path + '.part'
+    exported = 0
+    errors = []
+    cancelled = False
+    if os.path.lexists(temporary):
+        os.remove(temporary)  # left behind by an export that crashed
+    # O_EXCL: never write through a file or link that is already there
+    descriptor = os.open(temporary, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0), 0o600)
+    try:
+        with open(descriptor, 'w', newline='', encoding='utf-8') as file, \
+                ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            writer = csv.writer(file)
+            writer.writerow(PASSKEY_COLUMNS)
+            pending = deque()
+
+            def submit_next():
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(pool.submit(_decrypt_batch, cipher, vault, batch))
+
+            # A few batches in flight at a time, written in order, so only those few hold
+            # plain text in memory and a cancel only waits for them
+            for _ in range(2 * max(1, workers)):
+                submit_next()
+            while pending:
+                rows = pending.popleft().result()
+                for account, username, password, codes, error in rows:
+                    if error is not None:
+                        errors.append((f"{account} ({username})", error))
+                    else:
+                        writer.writerow([account, username, password, codes])
+                        exported += 1
+                if progress is not None:
+                    progress(exported + len(errors), len(keys))
+                if should_stop is not None and should_stop():
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+                    break
+                submit_next()
+        if not cancelled:
+            os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return {'exported': 0 if cancelled else exported, 'errors': errors, 'cancelled': cancelled,
+            'seconds': time.perf_counter() - started}
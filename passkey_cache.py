@@ -0,0 +1,72 @@
+# Small cache of decrypted PassKey secrets (no Qt needed).
+#
+# Values are kept as bytearrays so they can be overwritten with zeros when they are
+# evicted or the cache is cleared. Python makes its own str copies when a value is
+# shown, so this limits how long and how many secrets stay readable in memory; it
+# does not make them unreadable.
+import time
+import threading
+from collections import OrderedDict
+
+
+def _zero(buffer):
+    buffer[:] = bytes(len(buffer))
+
+
+class SecretCache:
+    # Least recently used entries are dropped beyond `max_entries`, and every entry
+    # expires `ttl` seconds after it was stored
+    def __init__(self, max_entries=16, ttl=120.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires, bytearray)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        # The cached text for `key`, or None when it is missing or expired
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1].decode('utf-8')
+
+    def put(self, key, text):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (self.clock() + self.ttl, bytearray(text.encode('utf-8')))
+            while len(self.entries) > self.max_entries:
+                self._drop(next(iter(self.entries)))
+
+    def discard(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+
+    def expire(self):
+        # Zeroes and drops every expired entry; returns how many were dropped
+        with self.lock:
+            now = self.clock()
+            expired = [key for key, (expires, _) in self.entries.items() if expires <= now]
+            for key in expired:
+                self._drop(key)
+            return len(expired)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._drop(key)
+
+    def _drop(self, key):
+        _zero(self.entries.pop(key)[1])
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
@@ -0,0 +1,36 @@
+# Where PassKey keeps its settings and encryption keys (no Qt needed).
+#
+#   Windows: %APPDATA%\PassKey
+#   macOS:   ~/Library/Application Support/PassKey
+#   Linux:   $XDG_CONFIG_HOME/passkey (~/.config/passkey)
+#
+# Older versions used C:\password_directory on every platform; on Windows its files
+# are copied into the new directory the first time it is created.
+import os
+import sys
+import shutil
+
+LEGACY_DIR = os.path.join("C:\\", "password_directory")
+CONFIG_FILES = ("main_directory.txt", "encryption_key.txt")
+
+
+def config_dir():
+    if sys.platform == 'win32':
+        return os.path.join(os.environ.get('APPDATA') or os.path.expanduser(os.path.join('~', 'AppData', 'Roaming')),
+                            'PassKey')
+    if sys.platform == 'darwin':
+        return os.path.expanduser(os.path.join('~', 'Library', 'Application Support', 'PassKey'))
+    return os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser(os.path.join('~', '.config')),
+                        'passkey')
+
+
+def ensure_config_dir(directory=None, legacy=LEGACY_DIR):
+    # Creates the config directory (private to the user) and migrates the old one into it
+    directory = directory or config_dir()
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if sys.platform == 'win32' and os.path.isdir(legacy):
+            for name in CONFIG_FILES:
+                if os.path.exists(os.path.join(legacy, name)):
+                    shutil.copy2(os.path.join(legacy, name), os.path.join(directory, name))
+    return directory
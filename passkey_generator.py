@@ -0,0 +1,159 @@
+# Password generation for PassKey (no Qt needed). Generates one password or
+# thousands at a time against a policy:
+#
+#   python passkey_generator.py -n 1000 --length 20 --exclude-ambiguous --shell-safe
+#
+# Random bytes are drawn from secrets.token_bytes in large blocks and mapped onto the
+# alphabet with one bytes.translate call: bytes below the largest multiple of the
+# alphabet size map to alphabet[byte % size] and the rest are deleted, so every
+# character is equally likely. A password missing a required class is discarded as
+# a whole, which keeps the result uniform over all passwords the policy allows.
+import re
+import sys
+import math
+import string
+import secrets
+import argparse
+
+CLASSES = {
+    'lower': string.ascii_lowercase,
+    'upper': string.ascii_uppercase,
+    'digits': string.digits,
+    'symbols': string.punctuation,
+}
+AMBIGUOUS = 'Il1|O0o`\'"'
+SHELL_UNSAFE = '`$\\"\'!&|;<>()*?[]{}~#^'
+
+
+class PasswordPolicy:
+    def __init__(self, length=25, classes=('lower', 'upper', 'digits', 'symbols'), require=None,
+                 exclude_ambiguous=False, shell_safe=False, exclude='', no_repeats=False):
+        # `require` lists the classes every password must contain (default: all used classes).
+        # `no_repeats` rejects the same character twice in a row.
+        excluded = set(exclude)
+        if exclude_ambiguous:
+            excluded.update(AMBIGUOUS)
+        if shell_safe:
+            excluded.update(SHELL_UNSAFE)
+        self.length = length
+        self.no_repeats = no_repeats
+        self.classes = {}
+        for name in classes:
+            if name not in CLASSES:
+                raise ValueError(f"Unknown character class {name!r}, expected one of {', '.join(CLASSES)}")
+            self.classes[name] = ''.join(character for character in CLASSES[name] if character not in excluded)
+        self.require = list(self.classes) if require is None else list(require)
+
+        self.alphabet = ''.join(self.classes.values())
+        if not self.alphabet:
+            raise ValueError("The policy leaves no characters to choose from")
+        for name in self.require:
+            if not self.classes.get(name):
+                raise ValueError(f"Required class {name!r} has no characters left")
+        if length < max(1, len(self.require)):
+            raise ValueError(f"A length of {length} cannot hold {len(self.require)} required classes")
+
+        # byte -> character for accepted bytes; bytes from `limit` up are rejected
+        self.limit = 256 - 256 % len(self.alphabet)
+        table = bytearray(256)
+        for byte in range(self.limit):
+            table[byte] = ord(self.alphabet[byte % len(self.alphabet)])
+        self.table = bytes(table)
+        self.rejected = bytes(range(self.limit, 256))
+        self.required_patterns = [re.compile('[' + re.escape(self.classes[name]) + ']').search
+                                  for name in self.require]
+        self.repeat = re.compile(r'(.)\1').search
+
+    def check(self, password):
+        if len(password) != self.length:
+            return False
+        if self.no_repeats and self.repeat(password):
+            return False
+        return all(search(password) for search in self.required_patterns)
+
+    def space(self):
+        # Upper bound on the number of distinct passwords (ignores the class rules)
+        if self.no_repeats:
+            return len(self.alphabet) * (len(self.alphabet) - 1) ** (self.length - 1)
+        return len(self.alphabet) ** self.length
+
+
+def random_characters(policy, count):
+    # `count` uniformly random characters from the policy's alphabet
+    parts = []
+    have = 0
+    while have < count:
+        # Enough bytes for the rest on average, plus a margin so one draw is usually enough
+        needed = (count - have) * 256 / policy.limit
+        chunk = secrets.token_bytes(int(needed * 1.05) + 64).translate(policy.table, policy.rejected)
+        parts.append(chunk)
+        have += len(chunk)
+    return b''.join(parts)[:count].decode('ascii')
+
+
+def generate_passwords(count, policy=None):
+    # `count` distinct passwords meeting `policy`. space() ignores the required classes,
+    # so a policy that allows fewer passwords than that is caught by giving up after a
+    # long run of rejected draws; the run allowed grows with the space so collecting
+    # the last few passwords of a small space does not trip it.
+    policy = policy or PasswordPolicy()
+    if count > policy.space():
+        raise ValueError(f"The policy allows fewer than {count} distinct passwords")
+    give_up = max(100000, 20 * min(policy.space(), 10 ** 6))
+    rejected = 0
+    length = policy.length
+    passwords = []
+    seen = set()
+    while len(passwords) < count:
+        if rejected > give_up:
+            raise ValueError(f"The policy allows fewer than {count} distinct passwords")
+        # Draw a little more than the rest needs; rejected passwords are simply dropped
+        missing = count - len(passwords)
+        batch = max(16, math.ceil(missing * 1.1))
+        characters = random_characters(policy, batch * length)
+        for start in range(0, batch * length, length):
+            password = characters[start:start + length]
+            if password not in seen and policy.check(password):
+                seen.add(password)
+                passwords.append(password)
+                rejected = 0
+                if len(passwords) == count:
+                    break
+            else:
+                rejected += 1
+    return passwords
+
+
+def generate_password(policy=None):
+    return generate_passwords(1, policy)[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate passwords that meet a policy.")
+    parser.add_argument('-n', '--count', type=int, default=1)
+    parser.add_argument('-l', '--length', type=int, default=25)
+    parser.add_argument('--classes', default=','.join(CLASSES),
+                        help="comma-separated classes to draw from: " + ", ".join(CLASSES))
+    parser.add_argument('--require', default=None, help="classes every password must contain (default: all)")
+    parser.add_argument('--exclude-ambiguous', action='store_true', help="leave out " + AMBIGUOUS)
+    parser.add_argument('--shell-safe', action='store_true', help="leave out " + SHELL_UNSAFE)
+    parser.add_argument('--exclude', default='', help="other characters to leave out")
+    parser.add_argument('--no-repeats', action='store_true', help="no character twice in a row")
+    args = parser.parse_args(argv)
+
+    try:
+        policy = PasswordPolicy(args.length, [name for name in args.classes.split(',') if name],
+                                None if args.require is None else [name for name in args.require.split(',') if name],
+                                args.exclude_ambiguous, args.shell_safe, args.exclude, args.no_repeats)
+        passwords = generate_passwords(args.count, policy)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        sys.stdout.write('\n'.join(passwords) + '\n')
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
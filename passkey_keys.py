@@ -0,0 +1,199 @@
+# Encryption keys and key rotation for PassKey (no Qt needed).
+#
+# The key file holds one Fernet key per line, newest first. Entries are encrypted
+# with the newest key and can be read with any key in the file, so the app keeps
+# working while a rotation is half done. A file with a single key (the old layout)
+# is read the same way.
+#
+# One key file can serve several vaults (the app can switch between directories), so
+# `<key file>.vaults` records, for every vault opened with it, the newest key that
+# vault is fully encrypted with. An old key is only dropped once no vault needs it.
+import os
+import json
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.fernet import Fernet, MultiFernet
+
+from passkey_vault import entry_sort_key
+
+
+def read_keys(path):
+    with open(path, 'rb') as file:
+        return [line.strip() for line in file.read().splitlines() if line.strip()]
+
+
+def write_keys(path, keys):
+    # Written to a temporary file first so a crash never leaves a half-written key file
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(b'\n'.join(keys) + b'\n')
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def key_fingerprint(key):
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+def make_cipher(keys):
+    # Encrypts with keys[0], decrypts with any of them
+    return MultiFernet([Fernet(key) for key in keys])
+
+
+def _registry_path(key_path):
+    return key_path + '.vaults'
+
+
+def _read_registry(key_path):
+    try:
+        with open(_registry_path(key_path), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def _vault_id(vault):
+    return os.path.normcase(os.path.abspath(vault.path))
+
+
+def register_vault(vault, key_path, keys):
+    # Records a vault as using this key file. A vault seen for the first time only
+    # needs the current key if it is empty; otherwise it may hold entries under any
+    # key in the file, which is recorded as None (needs them all) until it is rotated.
+    registry = _read_registry(key_path)
+    if _vault_id(vault) not in registry:
+        registry[_vault_id(vault)] = key_fingerprint(keys[0]) if len(vault) == 0 else None
+        _write_json(_registry_path(key_path), registry)
+
+
+def _keys_needed(key_path, keys):
+    # How many of the newest keys the registered vaults need between them. A vault
+    # rotated to a key needs that key and the newer ones (later saves use keys[0]).
+    fingerprints = [key_fingerprint(key) for key in keys]
+    needed = 1
+    for fingerprint in _read_registry(key_path).values():
+        if fingerprint not in fingerprints:
+            return len(keys)
+        needed = max(needed, fingerprints.index(fingerprint) + 1)
+    return needed
+
+
+def checkpoint_path(vault):
+    return vault.path + '.rotation'
+
+
+def rotation_pending(vault):
+    return os.path.exists(checkpoint_path(vault))
+
+
+def _write_json(path, state):
+    temporary = path + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def start_rotation(vault, key_path):
+    # Adds the new key unless a rotation is already under way; returns the keys.
+    # The new key is saved before anything is encrypted with it, and the checkpoint
+    # (kept next to the vault) only holds its fingerprint.
+    checkpoint = checkpoint_path(vault)
+    if os.path.exists(checkpoint):
+        return read_keys(key_path)
+    register_vault(vault, key_path, read_keys(key_path))
+    keys = [Fernet.generate_key()] + read_keys(key_path)
+    write_keys(key_path, keys)
+    _write_json(checkpoint, {'key': key_fingerprint(keys[0]), 'done': None})
+    return keys
+
+
+def _rotate_batch(cipher, vault, keys):
+    records = []
+    errors = []
+    for account, username in keys:
+        try:
+            record = vault.get(account, username)
+            records.append((account, username,
+                            cipher.rotate(record['password'].encode()).decode() if record['password'] else '',
+                            cipher.rotate(record['codes'].encode()).decode() if record['codes'] else ''))
+        except Exception as e:
+            errors.append((f"{account} ({username})", str(e)))
+    return records, errors
+
+
+def rotate_keys(vault, key_path, batch_size=500, workers=4, progress=None, should_stop=None):
+    # Adds a new key, re-encrypts every entry with it batch by batch, compacts the
+    # vault so no copy encrypted with an old key is left, then drops the old keys no
+    # other vault using the key file still needs.
+    # Each batch is committed before the checkpoint moves past it, so a rotation
+    # that stops for any reason continues where it left off when called again. An
+    # entry that cannot be decrypted stops the rotation with the old keys kept.
+    started = time.perf_counter()
+    checkpoint = checkpoint_path(vault)
+    keys = start_rotation(vault, key_path)
+    with open(checkpoint, encoding='utf-8') as file:
+        state = json.load(file)
+    if key_fingerprint(keys[0]) != state['key']:
+        raise ValueError("The key file does not start with the key this rotation was started with")
+    cipher = make_cipher(keys)
+
+    # Entries are rotated in vault order; 'done' is the last entry committed
+    entries = vault.entries()
+    if state['done'] is not None:
+        done = entry_sort_key(tuple(state['done']))
+        entries = [key for key in entries if entry_sort_key(key) > done]
+    batches = iter([entries[i:i + batch_size] for i in range(0, len(entries), batch_size)])
+    rotated = 0
+    errors = []
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque()
+
+        def submit_next():
+            batch = next(batches, None)
+            if batch is not None:
+                pending.append((batch, pool.submit(_rotate_batch, cipher, vault, batch)))
+
+        # A few batches in flight at a time; they are committed in order so the
+        # checkpoint only ever moves forward
+        for _ in range(2 * max(1, workers)):
+            submit_next()
+        while pending:
+            batch, future = pending.popleft()
+            records, errors = future.result()
+            if errors:
+                break  # the checkpoint stays before this batch, so a retry starts here
+            vault.put_many(records)
+            rotated += len(records)
+            state['done'] = list(batch[-1])
+            _write_json(checkpoint, state)
+            if progress is not None:
+                progress(rotated, len(entries))
+            if should_stop is not None and should_stop():
+                cancelled = True
+                break
+            submit_next()
+
+    finished = not cancelled and not errors
+    dropped = 0
+    if finished:
+        # Old records still sit in the file until compaction; only then can the old keys go
+        vault.compact()
+        registry = _read_registry(key_path)
+        registry[_vault_id(vault)] = key_fingerprint(keys[0])
+        _write_json(_registry_path(key_path), registry)
+        # Keys added by other rotations since this one started are kept as well
+        keys = read_keys(key_path)
+        kept = _keys_needed(key_path, keys)
+        if kept < len(keys):
+            write_keys(key_path, keys[:kept])
+        dropped = len(keys) - kept
+        os.remove(checkpoint)
+    return {'rotated': rotated, 'errors': errors, 'cancelled': cancelled, 'finished': finished,
+            'dropped': dropped, 'seconds': time.perf_counter() - started}
@@ -0,0 +1,161 @@
+# In-memory search over PassKey account names and usernames (no Qt needed).
+#
+# Every entry has one lower-cased "account<TAB>username" line, and the lines are
+# joined into one text in display order. A query is answered by scanning that text
+# with str.find and compiled patterns, which run in C, and a match is mapped back to
+# its entry by bisecting the line starts. Fuzzy matching only looks at the lines that
+# hold every character of the query, found by AND-ing per-character row masks. Results
+# come from a generator in display order, so a caller that shows the first rows only
+# pays for finding those.
+import re
+import heapq
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+FUZZY_BELOW = 1000  # fuzzy matches are only looked for when fewer exact matches were found
+
+
+def _sort_key(key):
+    return key[0].lower(), key[1].lower(), key
+
+
+def _line(key):
+    # A tab or newline inside a name would split the line, so they become spaces
+    return "\t".join(field.replace('\t', ' ').replace('\n', ' ') for field in key).lower()
+
+
+class SearchIndex:
+    def __init__(self, keys=()):
+        # keys are (account, username) pairs. sort_keys, keys and lines are parallel
+        # lists in display order; the joined text is rebuilt on the first search after a change.
+        self.sort_keys = sorted(_sort_key(key) for key in set(keys))
+        self.keys = [sort_key[2] for sort_key in self.sort_keys]
+        self.lines = [_line(key) for key in self.keys]
+        self.text = None
+        self.starts = None
+        self.masks = {}  # character -> int with byte `row` set to 1 when the line holds it
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return self._position(key) is not None
+
+    def add(self, account, username):
+        key = (account, username)
+        sort_key = _sort_key(key)
+        position = bisect_left(self.sort_keys, sort_key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return
+        self.sort_keys.insert(position, sort_key)
+        self.keys.insert(position, key)
+        self.lines.insert(position, _line(key))
+        self.text = None
+
+    def extend(self, keys):
+        # Adds many entries at once. Keys that sort after everything already held (as
+        # the vault's sorted chunks do while loading) are appended; anything else is
+        # merged by re-sorting, which timsort does in one pass over the two runs.
+        sort_keys = sorted(_sort_key(key) for key in set(keys) if key not in self)
+        if not sort_keys:
+            return
+        if self.sort_keys and sort_keys[0] < self.sort_keys[-1]:
+            self.sort_keys = sorted(self.sort_keys + sort_keys)
+            self.keys = [sort_key[2] for sort_key in self.sort_keys]
+            self.lines = [_line(key) for key in self.keys]
+        else:
+            self.sort_keys.extend(sort_keys)
+            self.keys.extend(sort_key[2] for sort_key in sort_keys)
+            self.lines.extend(_line(sort_key[2]) for sort_key in sort_keys)
+        self.text = None
+
+    def remove(self, account, username):
+        position = self._position((account, username))
+        if position is None:
+            return
+        del self.sort_keys[position], self.keys[position], self.lines[position]
+        self.text = None
+
+    def _position(self, key):
+        position = bisect_left(self.sort_keys, _sort_key(key))
+        return position if position < len(self.keys) and self.keys[position] == key else None
+
+    def _build(self):
+        if self.text is None:
+            self.text = '\n'.join(self.lines)
+            self.starts = list(accumulate((len(line) + 1 for line in self.lines[:-1]), initial=0))
+            self.masks = {}
+
+    def _found_rows(self, needle):
+        # Rows whose line contains `needle`, in order; one find per matching line
+        text, starts = self.text, self.starts
+        position = text.find(needle)
+        while position >= 0:
+            row = bisect_right(starts, position) - 1
+            yield row
+            if row + 1 == len(starts):
+                return
+            position = text.find(needle, starts[row + 1])
+
+    def _mask(self, character):
+        if character not in self.masks:
+            self.masks[character] = int.from_bytes(bytes([character in line for line in self.lines]), 'little')
+        return self.masks[character]
+
+    def _rows_with(self, characters):
+        # Rows whose line holds every one of `characters`, in order
+        mask = -1
+        for character in characters:
+            mask &= self._mask(character)
+        flags = mask.to_bytes(len(self.lines), 'little')
+        row = flags.find(1)
+        while row >= 0:
+            yield row
+            row = flags.find(1, row + 1)
+
+    def iter_search(self, query):
+        # Matching keys: prefix matches on either field first, then substring matches,
+        # then entries containing the query's characters in order. Each group keeps the
+        # index order; an empty query gives every key. The index must not change while
+        # the result is being read.
+        query = query.strip().lower()
+        if not query:
+            return iter(self.keys)
+        self._build()
+        # Masks are made for every character typed, even when the exact matches fill the
+        # caller's page, so each keystroke builds at most one (a few ms on 50k entries)
+        for character in set(query):
+            self._mask(character)
+        return self._search(query)
+
+    def _search(self, query):
+        keys, lines = self.keys, self.lines
+        # Accounts starting with the query are one run of rows in display order;
+        # usernames starting with it follow the tab in their line
+        low = bisect_left(self.sort_keys, (query,))
+        high = bisect_left(self.sort_keys, (query + '\U0010ffff',))
+        username_prefix = '\t' + query
+        exact = 0
+        last = -1
+        for row in heapq.merge(range(low, high), self._found_rows(username_prefix)):
+            if row != last:
+                exact += 1
+                last = row
+                yield keys[row]
+        for row in self._found_rows(query):
+            if not low <= row < high and username_prefix not in lines[row]:
+                exact += 1
+                yield keys[row]
+
+        # One character: fuzzy and substring are the same
+        if len(query) > 1 and exact < FUZZY_BELOW:
+            # [^c]*c jumps straight to the next wanted character, so there is no backtracking
+            pattern = re.compile(re.escape(query[0]) + ''.join(
+                f"[^{re.escape(character)}]*{re.escape(character)}" for character in query[1:])).search
+            for row in self._rows_with(set(query)):
+                line = lines[row]
+                if query not in line and pattern(line):
+                    yield keys[row]
+
+    def search(self, query):
+        return list(self.iter_search(query))
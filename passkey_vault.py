@@ -0,0 +1,388 @@
+# Single-file password vault for PassKey (no Qt needed).
+#
+# The vault is an append-only sequence of blocks after an 8-byte magic:
+#
+#   type (1 byte) | payload length (uint32) | payload | crc32 of the previous fields (uint32)
+#
+#   R  record: JSON account, username and the already encrypted password/codes tokens
+#   D  delete: JSON account and username
+#   I  index:  JSON [account, username, offset, size] of every live record
+#   T  trailer: sequence number and offset of the latest index block (uint64 each)
+#
+# A commit is its R/D blocks followed by a trailer, written and fsynced in one go.
+# Opening reads the trailer at the end of the file, the index block it points to and
+# only the blocks written after that index, so the list of accounts never needs the
+# records themselves. A torn write leaves no valid trailer at the end; the file is
+# then scanned up to the last good trailer and the rest is cut off by the next commit.
+import os
+import json
+import struct
+import zlib
+import threading
+
+MAGIC = b'PKVAULT1'
+VAULT_NAME = 'passkey.vault'
+
+RECORD = b'R'
+DELETE = b'D'
+INDEX = b'I'
+TRAILER = b'T'
+
+_HEAD = struct.Struct('<cI')
+_CRC = struct.Struct('<I')
+_TRAILER = struct.Struct('<QQ')
+TRAILER_SIZE = _HEAD.size + _TRAILER.size + _CRC.size
+
+SNAPSHOT_BLOCKS = 64  # blocks written after the last index before a new index is added
+
+
+def entry_sort_key(key):
+    # Case-insensitive order of (account, username) keys, ties broken by the exact key
+    return key[0].lower(), key[1].lower(), key
+
+
+class VaultError(Exception):
+    pass
+
+
+def _block(kind, payload):
+    head = _HEAD.pack(kind, len(payload))
+    return head + payload + _CRC.pack(zlib.crc32(head + payload))
+
+
+def _json(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+class Vault:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.index = {}  # (account, username) -> (offset, size) of its record block
+        self.sequence = 0
+        self.index_offset = 0
+        self.delta_blocks = 0  # blocks after the latest index block
+        self.end = len(MAGIC)  # end of the last complete commit
+        self.compactor = None
+        self.compact_lock = threading.Lock()  # one compaction at a time; they share the .compact file
+        self.file = None
+        if os.path.exists(path):
+            self.file = open(path, 'r+b')
+            self._load()
+
+    # -- reading -----------------------------------------------------------
+
+    def _read_block(self, offset, limit):
+        # (kind, payload, next offset), or None if the block is cut off or damaged
+        if offset + _HEAD.size > limit:
+            return None
+        self.file.seek(offset)
+        head = self.file.read(_HEAD.size)
+        kind, length = _HEAD.unpack(head)
+        end = offset + _HEAD.size + length + _CRC.size
+        if end > limit:
+            return None
+        payload = self.file.read(length)
+        crc, = _CRC.unpack(self.file.read(_CRC.size))
+        if crc != zlib.crc32(head + payload):
+            return None
+        return kind, payload, end
+
+    def _load(self):
+        self.file.seek(0)
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise VaultError(f"{self.path} is not a PassKey vault")
+        size = self.file.seek(0, os.SEEK_END)
+        tail = self._read_block(size - TRAILER_SIZE, size) if size - TRAILER_SIZE >= len(MAGIC) else None
+        if tail is not None and tail[0] == TRAILER:
+            self.sequence, self.index_offset = _TRAILER.unpack(tail[1])
+            start = len(MAGIC)
+            if self.index_offset:
+                block = self._read_block(self.index_offset, size)
+                if block is None or block[0] != INDEX:
+                    raise VaultError(f"{self.path}: index block is damaged")
+                self.index = {(account, username): (offset, length)
+                              for account, username, offset, length in json.loads(block[1])}
+                start = block[2]
+            self._replay(start, size)
+        else:
+            self._replay(len(MAGIC), size)
+
+    def _reload(self):
+        self.index = {}
+        self.sequence = self.index_offset = self.delta_blocks = 0
+        self.end = len(MAGIC)
+        self._load()
+
+    def _replay(self, offset, limit):
+        # Applies every complete commit from `offset`; stops at the first bad block
+        pending = []
+        while True:
+            block = self._read_block(offset, limit)
+            if block is None:
+                break
+            kind, payload, end = block
+            if kind == TRAILER:
+                for change in pending:
+                    self._apply(*change)
+                pending = []
+                self.sequence, _ = _TRAILER.unpack(payload)
+                self.end = end
+            elif kind == INDEX:
+                pending.append((INDEX, payload, offset, end))
+            elif kind in (RECORD, DELETE):
+                pending.append((kind, payload, offset, end))
+            offset = end
+
+    def _apply(self, kind, payload, offset, end):
+        if kind == INDEX:
+            self.index = {(account, username): (record_offset, length)
+                          for account, username, record_offset, length in json.loads(payload)}
+            self.index_offset = offset
+            self.delta_blocks = 0
+            return
+        entry = json.loads(payload)
+        key = (entry['account'], entry['username'])
+        if kind == RECORD:
+            self.index[key] = (offset, end - offset)
+        else:
+            self.index.pop(key, None)
+        self.delta_blocks += 1
+
+    def entries(self):
+        # (account, username) of every entry, sorted; no record is read
+        with self.lock:
+            return sorted(self.index, key=entry_sort_key)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, account, username):
+        # The stored record: account, username and the encrypted password and codes
+        with self.lock:
+            offset, size = self.index[(account, username)]
+            block = self._read_block(offset, offset + size)
+        if block is None or block[0] != RECORD:
+            raise VaultError(f"{self.path}: record for {account}/{username} is damaged")
+        return json.loads(block[1])
+
+    # -- writing -----------------------------------------------------------
+
+    def _commit(self, blocks):
+        # blocks: [(kind, payload)]; written with the trailer as one write, then fsynced
+        with self.lock:
+            if self.file is None:
+                self._create()
+            offset = self.end
+            data = []
+            changes = []
+            for kind, payload in blocks:
+                block = _block(kind, payload)
+                changes.append((kind, payload, offset, offset + len(block)))
+                data.append(block)
+                offset += len(block)
+            for change in changes:
+                self._apply(*change)
+            if self.delta_blocks >= max(SNAPSHOT_BLOCKS, len(self.index) // 8):
+                self.index_offset = offset
+                self.delta_blocks = 0
+                data.append(_block(INDEX, self._index_payload()))
+                offset += len(data[-1])
+            self.sequence += 1
+            data.append(_block(TRAILER, _TRAILER.pack(self.sequence, self.index_offset)))
+
+            try:
+                self.file.seek(self.end)
+                self.file.truncate()  # drops a torn commit left by a crash
+                self.file.write(b''.join(data))
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError:
+                self._reload()  # the index was updated ahead of the write; go back to what is on disk
+                raise
+            self.end = offset + TRAILER_SIZE
+
+    def _create(self):
+        # The file only appears with its magic already on disk, so a crash never leaves an empty vault
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(MAGIC)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self.file = open(self.path, 'r+b')
+
+    def _index_payload(self):
+        return _json([[account, username, offset, size] for (account, username), (offset, size) in self.index.items()])
+
+    def put(self, account, username, password, codes):
+        self.put_many([(account, username, password, codes)])
+
+    def put_many(self, records):
+        # Adds or replaces (account, username, password token, codes token) entries in one commit
+        self._commit([(RECORD, _json({'account': account, 'username': username,
+                                      'password': password, 'codes': codes}))
+                      for account, username, password, codes in records])
+
+    def delete(self, account, username):
+        if (account, username) in self.index:
+            self._commit([(DELETE, _json({'account': account, 'username': username}))])
+
+    # -- compaction --------------------------------------------------------
+
+    def garbage_ratio(self):
+        with self.lock:
+            live = sum(size for _, size in self.index.values())
+            return 1 - live / max(1, self.end - len(MAGIC))
+
+    def compact(self):
+        # Rewrites the vault with only the live records. Commits made while the copy
+        # runs are folded in before the new file replaces the old one. A call made while
+        # another compaction runs (e.g. a background one) waits for it, then compacts.
+        with self.compact_lock:
+            self._compact()
+
+    def _compact(self):
+        with self.lock:
+            if self.file is None:
+                return
+            snapshot = dict(self.index)
+            snapshot_end = self.end
+        temporary = self.path + '.compact'
+        offsets = {}
+        target = open(temporary, 'w+b')
+        try:
+            target.write(MAGIC)
+            # Everything before snapshot_end is immutable, so it is copied without the lock
+            with open(self.path, 'rb') as source:
+                for key, (offset, size) in snapshot.items():
+                    source.seek(offset)
+                    offsets[key] = (target.tell(), size)
+                    target.write(source.read(size))
+
+            with self.lock:
+                for key, (offset, size) in self.index.items():
+                    if offset >= snapshot_end:
+                        self.file.seek(offset)
+                        offsets[key] = (target.tell(), size)
+                        target.write(self.file.read(size))
+                index = {key: offsets[key] for key in self.index}
+                index_offset = target.tell()
+                target.write(_block(INDEX, _json([[account, username, offset, size]
+                                                  for (account, username), (offset, size) in index.items()])))
+                target.write(_block(TRAILER, _TRAILER.pack(self.sequence + 1, index_offset)))
+                target.flush()
+                os.fsync(target.fileno())
+                end = target.tell()
+                target.close()
+
+                self.file.close()
+                os.replace(temporary, self.path)
+                self.file = open(self.path, 'r+b')
+                self.sequence += 1
+                self.index = index
+                self.index_offset = index_offset
+                self.delta_blocks = 0
+                self.end = end
+        finally:
+            target.close()
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def compact_async(self):
+        # Compacts on a background thread unless a compaction is already running
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return self.compactor
+            self.compactor = threading.Thread(target=self.compact, daemon=True)
+            self.compactor.start()
+            return self.compactor
+
+    def maybe_compact(self, min_size=1 << 20, ratio=0.5):
+        # Starts a background compaction once more than `ratio` of a big vault is dead
+        if self.end >= min_size and self.garbage_ratio() > ratio:
+            return self.compact_async()
+        return None
+
+    def close(self):
+        if self.compactor is not None:
+            self.compactor.join()
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_password_file(path):
+    # (password token, codes token) from the old one-file-per-entry layout
+    password = codes = ''
+    with open(path, 'r') as file:
+        for line in file.read().split('\n'):
+            if line.startswith("Encrypted Password: "):
+                password = line.replace('Encrypted Password: ', '')
+            elif line.startswith("Encrypted Codes: "):
+                codes = line.replace('Encrypted Codes: ', '')
+    return password, codes
+
+
+def find_password_files(directory):
+    # (path, account, username) for every <account>_<username>_password.txt under `directory`
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith("_password.txt"):
+                parts = os.path.splitext(file)[0].split('_')
+                if len(parts) >= 3:
+                    yield os.path.join(root, file), ' '.join(parts[:-2]), parts[-2]
+
+
+def migrate_password_files(directory, vault):
+    # Copies the old password files into `vault` in one commit. The tokens are stored
+    # as they are (no decryption) and the old files are left in place.
+    records = []
+    for path, account, username in find_password_files(directory):
+        password, codes = read_password_file(path)
+        records.append((account, username, password, codes))
+    if records:
+        vault.put_many(records)
+    return len(records)
+
+
+def _never_committed(path):
+    # True for a vault file left by a crash before its first commit was on disk: empty,
+    # part of the magic, or the magic followed by a torn block (no trailer)
+    with open(path, 'rb') as file:
+        head = file.read(len(MAGIC))
+    if not MAGIC.startswith(head):
+        return False
+    if len(head) < len(MAGIC):
+        return True
+    vault = Vault(path)
+    try:
+        return vault.sequence == 0
+    finally:
+        vault.close()
+
+
+def open_vault(directory):
+    # The vault in `directory`; the first time, any old password files are migrated into it.
+    # The migration is written to a separate file that only takes the vault's name once
+    # its commit is on disk, so a crash part way leaves no vault and it simply runs again.
+    path = os.path.join(directory, VAULT_NAME)
+    if os.path.exists(path) and not _never_committed(path):
+        return Vault(path)
+    temporary = path + '.migrate'
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    migration = Vault(temporary)
+    try:
+        migrated = migrate_password_files(directory, migration)
+    finally:
+        migration.close()
+    if migrated:
+        os.replace(temporary, path)
+    elif os.path.exists(path):
+        os.remove(path)  # nothing to migrate and nothing was ever committed to it
+    return Vault(path)
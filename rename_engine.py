@@ -0,0 +1,561 @@
+# Rename planning and execution for the Batch Rename Tool (no Qt needed).
+# Scanning, planning and executing are separate steps, so the GUI, the command
+# line and the benchmarks all drive the same code:
+#
+#   python rename_engine.py ~/renders --name shot --suffix beauty --order frame --dry-run
+import os
+import sys
+import json
+import errno
+import time
+import secrets
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from image_sequences import NATURAL, ORDERS, order_names
+
+JOURNAL_NAME = '.batch_rename_journal.jsonl'
+
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.exr', '.tga', '.svg', '.psd', '.ai',
+                    '.pic', '.rat']
+
+# Naming template tokens: {folder}, {new_name}, {suffix}, {index} (padded) and {ext}
+DEFAULT_TEMPLATE = '{new_name}_{suffix}_{index}{ext}'
+
+
+def scan_images(folder, extensions, chunk_size=5000, interval=0.1):
+    # Yields lists of image file names as the folder is read, so a caller can show
+    # them before the scan finishes. A chunk is emitted when it is full or when
+    # `interval` seconds have passed since the last one.
+    extensions = {extension.lower() for extension in extensions}
+    chunk = []
+    last = time.monotonic()
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if os.path.splitext(entry.name)[1].lower() not in extensions:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            chunk.append(entry.name)
+            if len(chunk) >= chunk_size or time.monotonic() - last >= interval:
+                yield chunk
+                chunk = []
+                last = time.monotonic()
+    if chunk:
+        yield chunk
+
+
+def _valid_name(name):
+    # A new name must stay in its folder: no separators, and not empty, '.' or '..'
+    return name not in ('', '.', '..') and os.sep not in name and not (os.altsep and os.altsep in name)
+
+
+def build_renames(names, new_name, suffix, padding, template=DEFAULT_TEMPLATE, folder_name=''):
+    # Numbers `names` in the given order, starting at 1. Extensions are lower-cased.
+    renames = []
+    for index, name in enumerate(names, 1):
+        extension = os.path.splitext(name)[-1].lower()
+        try:
+            new = template.format(folder=folder_name, new_name=new_name, suffix=suffix,
+                                  index=f"{index:0{padding}d}", ext=extension)
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"Invalid naming template {template!r}: {e}") from None
+        if not _valid_name(new):
+            raise ValueError(f"Invalid naming template {template!r}: {new!r} is not a file name")
+        renames.append((name, new))
+    return renames
+
+
+class RenameConflictError(Exception):
+    def __init__(self, conflicts):
+        super().__init__("; ".join(conflicts))
+        self.conflicts = conflicts
+
+
+class RenamePlan:
+    # Ordered old -> new renames for one folder. Each group is a chain or a cycle of
+    # renames; a cycle is broken with a single temporary name. Groups are independent,
+    # so stopping between groups, or between the steps of a chain, never leaves a file
+    # under a temporary name.
+    def __init__(self, folder, groups):
+        self.folder = folder
+        self.groups = groups
+
+    @property
+    def steps(self):
+        return [step for group in self.groups for step in group]
+
+    @property
+    def temporary_moves(self):
+        return sum(1 for group in self.groups for _, new in group if _is_temporary(new))
+
+    def __len__(self):
+        return sum(len(group) for group in self.groups)
+
+
+def _temporary_name(folder, name, taken):
+    while True:
+        candidate = f".{name}.renametmp-{secrets.token_hex(4)}"
+        if candidate not in taken and not os.path.lexists(os.path.join(folder, candidate)):
+            taken.add(candidate)
+            return candidate
+
+
+def _is_temporary(name):
+    return name.startswith('.') and '.renametmp-' in name
+
+
+def plan_renames(folder, renames):
+    # renames: iterable of (old_name, new_name) inside `folder`.
+    # Raises RenameConflictError when two files want the same name, a new name would
+    # leave the folder, or a target is occupied by a file that is not part of the batch.
+    mapping = {}
+    conflicts = []
+    claimed = {}
+    for old, new in renames:
+        if old in mapping:
+            conflicts.append(f"{old} is listed twice")
+            continue
+        if not _valid_name(new):
+            conflicts.append(f"{new!r} is not a file name in this folder")
+            continue
+        if new in claimed:
+            conflicts.append(f"{old} and {claimed[new]} would both become {new}")
+            continue
+        mapping[old] = new
+        claimed[new] = old
+
+    # Renaming a file to itself is a no-op
+    mapping = {old: new for old, new in mapping.items() if old != new}
+    for old, new in mapping.items():
+        if not os.path.lexists(os.path.join(folder, old)):
+            conflicts.append(f"{old} no longer exists")
+            continue
+        target = os.path.join(folder, new)
+        if new not in mapping and os.path.lexists(target):
+            if not os.path.samefile(os.path.join(folder, old), target):  # case-only rename
+                conflicts.append(f"{new} already exists and is not part of this rename")
+    if conflicts:
+        raise RenameConflictError(conflicts)
+
+    # Every name has at most one incoming and one outgoing rename, so the mapping
+    # splits into simple chains and cycles
+    sources_by_target = {new: old for old, new in mapping.items()}
+    taken = set(mapping) | set(mapping.values())
+    groups = []
+    visited = set()
+
+    # Chains: start at the end whose target is free and walk back to the head
+    for old, new in mapping.items():
+        if old in visited or new in mapping:
+            continue
+        group = []
+        current = old
+        while current is not None and current not in visited:
+            visited.add(current)
+            group.append((current, mapping[current]))
+            current = sources_by_target.get(current)
+        groups.append(group)
+
+    # Whatever is left forms cycles; park one file on a temporary name per cycle
+    for old in mapping:
+        if old in visited:
+            continue
+        temporary = _temporary_name(folder, old, taken)
+        group = [(old, temporary)]
+        visited.add(old)
+        current = sources_by_target[old]
+        while current != old:
+            visited.add(current)
+            group.append((current, mapping[current]))
+            current = sources_by_target[current]
+        group.append((temporary, mapping[old]))
+        groups.append(group)
+
+    return RenamePlan(folder, groups)
+
+
+class RenameJournal:
+    # Append-only JSON Lines record of a plan and every finished step, kept in the
+    # folder so an interrupted batch can be resumed or undone later.
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @classmethod
+    def for_folder(cls, folder):
+        return cls(os.path.join(folder, JOURNAL_NAME))
+
+    def start(self, plan):
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({'type': 'plan', 'folder': plan.folder, 'groups': plan.groups}, sync=True)
+
+    def reopen(self):
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def step_done(self, index):
+        self._write({'type': 'done', 'step': index})
+
+    def step_undone(self, index):
+        self._write({'type': 'undone', 'step': index})
+
+    def finish(self, state):
+        # state is 'complete' or 'undone'
+        self._write({'type': state}, sync=True)
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, record, sync=False):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def read(self):
+        # Returns (plan, done_steps, state); state is None while the batch is unfinished
+        plan = None
+        done = set()
+        state = None
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last line after a crash
+                if record['type'] == 'plan':
+                    plan = RenamePlan(record['folder'], [[tuple(step) for step in group]
+                                                         for group in record['groups']])
+                elif record['type'] == 'done':
+                    done.add(record['step'])
+                    state = None
+                elif record['type'] == 'undone':
+                    # A step undone after 'complete' leaves the batch unfinished until undo finishes
+                    done.discard(record['step'])
+                    state = None
+                else:
+                    state = record['type']
+        return plan, done, state
+
+
+def _folder_journal(folder, states):
+    journal = RenameJournal.for_folder(folder)
+    if not os.path.exists(journal.path):
+        return None
+    try:
+        plan, _, state = journal.read()
+    except (OSError, KeyError, ValueError):
+        return None
+    return journal if plan is not None and state in states else None
+
+
+def pending_journal(folder):
+    # The journal of an interrupted batch in `folder`, or None
+    return _folder_journal(folder, (None,))
+
+
+def undoable_journal(folder):
+    # The journal of the last batch in `folder` if it has not been undone yet
+    return _folder_journal(folder, (None, 'complete'))
+
+
+def _step_applied(folder, old, new):
+    # Catches a rename that happened just before a crash, before it was journaled
+    return not os.path.lexists(os.path.join(folder, old)) and os.path.lexists(os.path.join(folder, new))
+
+
+def _rename(folder, old, new):
+    # The plan only renames onto names it has freed, so anything at the target now
+    # appeared since (a new render in live mode, say) and is never replaced. Raising
+    # leaves the journal unfinished, to be resumed or undone once the name is free.
+    source = os.path.join(folder, old)
+    target = os.path.join(folder, new)
+    if os.path.lexists(target) and not os.path.samefile(source, target):  # samefile: case-only rename
+        raise FileExistsError(errno.EEXIST, f"{new} already exists and is not part of this rename", target)
+    os.rename(source, target)
+
+
+def execute_plan(plan, journal=None, done=None, progress=None, should_stop=None):
+    # Runs the plan group by group. `done` holds step indexes that already ran (resume).
+    # progress(old, new) is called after each rename. should_stop() is checked before
+    # every step of a chain, which leaves every name valid wherever it stops, and
+    # before each cycle, which runs as a whole so no file is left on a temporary name.
+    # Returns the list of (old, new) renames performed, temporary hops excluded.
+    done = set(done or ())
+    performed = []
+    index = 0
+    stopped = False
+    try:
+        for group in plan.groups:
+            cycle = _is_temporary(group[0][1])
+            for position, (old, new) in enumerate(group):
+                if should_stop is not None and (position == 0 or not cycle) and should_stop():
+                    stopped = True
+                    break
+                if index not in done:
+                    if not _step_applied(plan.folder, old, new):
+                        _rename(plan.folder, old, new)
+                    if journal is not None:
+                        journal.step_done(index)
+                    performed.append((old, new))
+                    if progress is not None:
+                        progress(old, new)
+                index += 1
+            if stopped:
+                break
+        else:
+            if journal is not None:
+                journal.finish('complete')
+    finally:
+        if journal is not None:
+            journal.close()
+    return _collapse(performed)
+
+
+def _collapse(performed):
+    # Fold a -> tmp, tmp -> b into a -> b
+    result = []
+    parked = {}
+    for old, new in performed:
+        if _is_temporary(new):
+            parked[new] = old
+        elif _is_temporary(old):
+            result.append((parked.pop(old, old), new))
+        else:
+            result.append((old, new))
+    return result
+
+
+def resume(journal, progress=None, should_stop=None):
+    plan, done, _ = journal.read()
+    journal.reopen()
+    return execute_plan(plan, journal, done, progress, should_stop)
+
+
+def undo(journal, progress=None):
+    # Reverses every step that ran, newest first. Returns the (current, restored) renames.
+    plan, done, _ = journal.read()
+    steps = plan.steps
+    # Steps run in order, so only the one after the last journaled step can have
+    # happened without being recorded
+    following = max(done) + 1 if done else 0
+    if following < len(steps) and _step_applied(plan.folder, *steps[following]):
+        done.add(following)
+
+    journal.reopen()
+    reverted = []
+    try:
+        for index in sorted(done, reverse=True):
+            old, new = steps[index]
+            if not _step_applied(plan.folder, new, old):
+                _rename(plan.folder, new, old)
+            journal.step_undone(index)
+            reverted.append((new, old))
+            if progress is not None:
+                progress(new, old)
+        journal.finish('undone')
+    finally:
+        journal.close()
+    return _collapse(reverted)
+
+
+def iter_folders(root):
+    # `root` and every folder below it, without following symlinks
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        yield folder
+        try:
+            with os.scandir(folder) as entries:
+                subfolders = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            continue
+        stack.extend(sorted(subfolders, reverse=True))
+
+
+def plan_folder(folder, names, new_name, suffix, padding, template=DEFAULT_TEMPLATE, order=NATURAL, cache=None):
+    # Numbers `names` in `order` (see image_sequences.order_names) and plans the renames.
+    # A folder whose last batch did not finish is a conflict: starting a new batch
+    # would overwrite its journal, and with it the only way to resume or undo it.
+    if pending_journal(folder) is not None:
+        raise RenameConflictError(["An earlier rename in this folder did not finish; resume or undo it first"])
+    names = order_names(folder, names, order, cache)
+    return plan_renames(folder, build_renames(names, new_name, suffix, padding, template, os.path.basename(folder)))
+
+
+def plan_tree(root, new_name, suffix, padding, template=DEFAULT_TEMPLATE, extensions=IMAGE_EXTENSIONS,
+              order=NATURAL, cache=None, recursive=True):
+    # Plans every folder under `root` (or just `root`) before anything is renamed.
+    # Folders with conflicts are left out of the plan and reported instead.
+    started = time.perf_counter()
+    plans = []
+    conflicts = {}
+    for folder in iter_folders(root) if recursive else [root]:
+        try:
+            names = [name for chunk in scan_images(folder, extensions) for name in chunk]
+        except OSError as e:
+            conflicts[folder] = [str(e)]
+            continue
+        if not names:
+            continue
+        try:
+            plan = plan_folder(folder, names, new_name, suffix, padding, template, order, cache)
+        except RenameConflictError as e:
+            conflicts[folder] = e.conflicts
+            continue
+        except ValueError as e:  # the template gives an invalid name with this folder's {folder}
+            conflicts[folder] = [str(e)]
+            continue
+        if len(plan):
+            plans.append(plan)
+    return {'root': root, 'plans': plans, 'conflicts': conflicts,
+            'plan_seconds': time.perf_counter() - started}
+
+
+def execute_tree(tree, workers=4, progress=None, should_stop=None):
+    # Runs the folder plans from plan_tree concurrently, each with its own journal,
+    # and returns one report for the whole tree
+    started = time.perf_counter()
+    lock = threading.Lock()
+
+    def locked_progress(old, new):
+        with lock:
+            progress(old, new)
+
+    def run(plan):
+        if should_stop is not None and should_stop():
+            return []
+        journal = RenameJournal.for_folder(plan.folder)
+        journal.start(plan)
+        return execute_plan(plan, journal, progress=locked_progress if progress else None,
+                            should_stop=should_stop)
+
+    renamed = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [(plan.folder, pool.submit(run, plan)) for plan in tree['plans']]
+        for folder, future in futures:
+            try:
+                renamed[folder] = future.result()
+            except OSError as e:
+                errors[folder] = str(e)
+
+    return {'root': tree['root'],
+            'folders': len(tree['plans']),
+            'files_planned': sum(len(plan) - plan.temporary_moves for plan in tree['plans']),
+            'files_renamed': sum(len(performed) for performed in renamed.values()),
+            'temporary_moves': sum(plan.temporary_moves for plan in tree['plans']),
+            'conflict_folders': len(tree['conflicts']),
+            'conflicts': tree['conflicts'],
+            'errors': errors,
+            'renamed': renamed,
+            'plan_seconds': tree['plan_seconds'],
+            'execute_seconds': time.perf_counter() - started}
+
+
+def undo_tree(root, recursive=True, progress=None):
+    # Undoes the last batch in `root` and, when recursive, in every folder below it,
+    # the way execute_tree journaled them. Undo never stops halfway, so there is no should_stop.
+    started = time.perf_counter()
+    restored = {}
+    errors = {}
+    for folder in iter_folders(root) if recursive else [root]:
+        journal = undoable_journal(folder)
+        if journal is None:
+            continue
+        try:
+            restored[folder] = undo(journal, progress)
+        except OSError as e:
+            errors[folder] = str(e)
+    return {'root': root,
+            'folders': len(restored),
+            'files_restored': sum(len(reverted) for reverted in restored.values()),
+            'errors': errors,
+            'restored': restored,
+            'undo_seconds': time.perf_counter() - started}
+
+
+def main(argv=None):
+    # Headless entry point: renames the images in a folder (or a tree of folders) and
+    # prints a JSON report, or finishes/undoes the last batch from its journal
+    parser = argparse.ArgumentParser(description="Batch rename images into numbered names.")
+    parser.add_argument('folder')
+    parser.add_argument('--name', default='', help="value of {new_name}")
+    parser.add_argument('--suffix', default='', help="value of {suffix}")
+    parser.add_argument('--padding', type=int, default=4, help="digits in {index}")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE,
+                        help="naming template; tokens: {folder} {new_name} {suffix} {index} {ext}")
+    parser.add_argument('--order', choices=ORDERS, default=NATURAL, help="order files are numbered in")
+    parser.add_argument('--extensions', default=','.join(IMAGE_EXTENSIONS), help="comma-separated extensions")
+    parser.add_argument('-r', '--recursive', action='store_true', help="also rename inside subfolders")
+    parser.add_argument('-j', '--workers', type=int, default=4, help="folders renamed in parallel")
+    parser.add_argument('-n', '--dry-run', action='store_true', help="print the planned renames only")
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--resume', action='store_true', help="finish an interrupted batch")
+    action.add_argument('--undo', action='store_true', help="undo the last batch")
+    args = parser.parse_args(argv)
+
+    folders = list(iter_folders(args.folder)) if args.recursive else [args.folder]
+    if args.resume or args.undo:
+        status = 0
+        for folder in folders:
+            journal = pending_journal(folder) if args.resume else undoable_journal(folder)
+            if journal is None:
+                continue
+            try:
+                performed = resume(journal) if args.resume else undo(journal)
+            except OSError as e:
+                print(f"{folder}: {e}", file=sys.stderr)
+                status = 1
+                continue
+            print(f"{folder}: {len(performed)} files {'renamed' if args.resume else 'restored'}", file=sys.stderr)
+        return status
+
+    extensions = [extension if extension.startswith('.') else '.' + extension
+                  for extension in args.extensions.split(',') if extension]
+    try:
+        build_renames(['check.png'], args.name, args.suffix, args.padding, args.template)
+    except ValueError as e:
+        parser.error(str(e))
+    tree = plan_tree(args.folder, args.name, args.suffix, args.padding, args.template, extensions, args.order,
+                     recursive=args.recursive)
+    for folder, conflicts in tree['conflicts'].items():
+        for conflict in conflicts:
+            print(f"{folder}: {conflict}", file=sys.stderr)
+
+    if args.dry_run:
+        try:
+            for plan in tree['plans']:
+                for old, new in _collapse(plan.steps):
+                    print(f"{os.path.join(plan.folder, old)}\t{new}")
+        except BrokenPipeError:
+            pass
+        return 1 if tree['conflicts'] else 0
+
+    # Renames run on a thread so Ctrl+C can stop them between steps
+    stop = threading.Event()
+    result = {}
+    runner = threading.Thread(target=lambda: result.update(execute_tree(tree, args.workers, should_stop=stop.is_set)))
+    runner.start()
+    try:
+        while runner.is_alive():
+            runner.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        runner.join()
+
+    report = {key: value for key, value in result.items() if key != 'renamed'}
+    report['cancelled'] = stop.is_set()
+    print(json.dumps(report, indent=2))
+    return 1 if result['conflicts'] or result['errors'] or stop.is_set() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Crash-safety checks for the PassKey vault file: run with `python -m pytest tests`
+import os
+import threading
+
+from passkey_vault import MAGIC, VAULT_NAME, Vault, open_vault
+
+
+def _put(vault, account, username='me'):
+    vault.put(account, username, f'token-{account}', '')
+
+
+def test_reopen_reads_every_commit(tmp_path):
+    path = str(tmp_path / VAULT_NAME)
+    vault = Vault(path)
+    for i in range(200):  # enough commits for several index blocks
+        _put(vault, f'site{i}')
+    vault.delete('site0', 'me')
+    vault.close()
+
+    vault = Vault(path)
+    assert len(vault) == 199
+    assert ('site0', 'me') not in vault
+    assert vault.get('site199', 'me')['password'] == 'token-site199'
+    vault.close()
+
+
+def test_torn_tail_is_dropped_and_cut_off_by_the_next_commit(tmp_path):
+    path = str(tmp_path / VAULT_NAME)
+    vault = Vault(path)
+    _put(vault, 'kept')
+    good_size = os.path.getsize(path)
+    _put(vault, 'torn' * 100)  # longer than the next commit, so it must be cut off, not overwritten
+    vault.close()
+    # A crash part way through the second commit leaves some of its bytes behind
+    with open(path, 'r+b') as file:
+        file.truncate(os.path.getsize(path) - 5)
+
+    vault = Vault(path)
+    assert vault.entries() == [('kept', 'me')]
+    assert vault.end == good_size
+    _put(vault, 'after')
+    vault.close()
+
+    vault = Vault(path)
+    assert os.path.getsize(path) == vault.end
+    assert vault.entries() == [('after', 'me'), ('kept', 'me')]
+    assert vault.get('after', 'me')['password'] == 'token-after'
+    vault.close()
+
+
+def test_damaged_block_stops_replay_at_the_last_good_commit(tmp_path):
+    path = str(tmp_path / VAULT_NAME)
+    vault = Vault(path)
+    _put(vault, 'kept')
+    good_size = os.path.getsize(path)
+    _put(vault, 'damaged')
+    vault.close()
+    with open(path, 'r+b') as file:
+        file.seek(good_size + 8)
+        file.write(b'\xff')
+
+    vault = Vault(path)
+    assert vault.entries() == [('kept', 'me')]
+    vault.close()
+
+
+def test_compaction_keeps_commits_made_while_it_runs(tmp_path):
+    path = str(tmp_path / VAULT_NAME)
+    vault = Vault(path)
+    for i in range(300):
+        _put(vault, f'site{i}')
+    for i in range(0, 300, 2):
+        _put(vault, f'site{i}')  # overwritten records become garbage
+    stop = threading.Event()
+    written = []
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            _put(vault, f'new{i}')
+            written.append(f'new{i}')
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    for _ in range(5):
+        vault.compact()
+    stop.set()
+    thread.join()
+    vault.close()
+
+    vault = Vault(path)
+    expected = {(f'site{i}', 'me') for i in range(300)} | {(account, 'me') for account in written}
+    assert set(vault.entries()) == expected
+    for account, username in expected:
+        assert vault.get(account, username)['password'] == f'token-{account}'
+    vault.close()
+    assert not os.path.exists(path + '.compact')
+
+
+def _legacy_files(directory, count):
+    for i in range(count):
+        with open(os.path.join(directory, f'site{i}_me_password.txt'), 'w') as file:
+            file.write(f"Encrypted Password: token-site{i}\nEncrypted Codes: \n")
+
+
+def test_open_vault_migrates_old_password_files(tmp_path):
+    _legacy_files(str(tmp_path), 20)
+    vault = open_vault(str(tmp_path))
+    assert len(vault) == 20
+    vault.close()
+    assert not os.path.exists(str(tmp_path / (VAULT_NAME + '.migrate')))
+
+
+def test_open_vault_restarts_a_migration_that_crashed(tmp_path):
+    _legacy_files(str(tmp_path), 20)
+    path = str(tmp_path / VAULT_NAME)
+    # Left by a crash: a half-written migration file and a vault whose first commit is torn
+    with open(path + '.migrate', 'wb') as file:
+        file.write(MAGIC + b'R\x10')
+    with open(path, 'wb') as file:
+        file.write(MAGIC + b'R\x00\x01')
+
+    vault = open_vault(str(tmp_path))
+    assert len(vault) == 20
+    assert vault.get('site3', 'me')['password'] == 'token-site3'
+    vault.close()
+
+
+def test_open_vault_restarts_after_an_empty_vault_file(tmp_path):
+    _legacy_files(str(tmp_path), 3)
+    open(str(tmp_path / VAULT_NAME), 'wb').close()
+    vault = open_vault(str(tmp_path))
+    assert len(vault) == 3
+    vault.close()
+
+
+def test_open_vault_keeps_an_existing_vault(tmp_path):
+    vault = open_vault(str(tmp_path))
+    _put(vault, 'mine')
+    vault.close()
+    _legacy_files(str(tmp_path), 5)  # only migrated the first time
+    vault = open_vault(str(tmp_path))
+    assert vault.entries() == [('mine', 'me')]
+    vault.close()
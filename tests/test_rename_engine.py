@@ -0,0 +1,151 @@
+# Planning, journaling, resume and undo checks for the rename engine: run with `python -m pytest tests`
+import os
+
+import pytest
+
+from rename_engine import (RenameConflictError, RenameJournal, build_renames, execute_plan, pending_journal,
+                           plan_renames, resume, undo, undoable_journal)
+
+
+def _files(folder, names):
+    # Each file holds its original name, so a test can tell where every file ended up
+    for name in names:
+        with open(os.path.join(folder, name), 'w') as file:
+            file.write(name)
+
+
+def _contents(folder):
+    result = {}
+    for name in os.listdir(folder):
+        if name != os.path.basename(RenameJournal.for_folder(folder).path):
+            with open(os.path.join(folder, name)) as file:
+                result[name] = file.read()
+    return result
+
+
+def _run(folder, renames, stop_after=None):
+    plan = plan_renames(folder, renames)
+    journal = RenameJournal.for_folder(folder)
+    journal.start(plan)
+    calls = []
+
+    def should_stop():
+        calls.append(None)
+        return stop_after is not None and len(calls) > stop_after
+
+    execute_plan(plan, journal, should_stop=should_stop)
+    return plan
+
+
+def test_chain_is_ordered_so_no_file_is_overwritten(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['shot_0001.png', 'shot_0002.png', 'shot_0003.png'])
+    renames = [('shot_0001.png', 'shot_0002.png'), ('shot_0002.png', 'shot_0003.png'),
+               ('shot_0003.png', 'shot_0004.png')]
+    plan = _run(folder, renames)
+    assert plan.temporary_moves == 0
+    assert _contents(folder) == {new: old for old, new in renames}
+
+
+def test_cycle_uses_one_temporary_name(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['a.png', 'b.png', 'c.png'])
+    renames = [('a.png', 'b.png'), ('b.png', 'c.png'), ('c.png', 'a.png')]
+    plan = _run(folder, renames)
+    assert plan.temporary_moves == 1
+    assert _contents(folder) == {new: old for old, new in renames}
+    assert undoable_journal(folder) is not None and pending_journal(folder) is None
+
+
+def test_conflicts_are_found_before_anything_moves(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['a.png', 'b.png', 'taken.png'])
+    with pytest.raises(RenameConflictError) as error:
+        plan_renames(folder, [('a.png', 'same.png'), ('b.png', 'same.png')])
+    assert 'would both become same.png' in error.value.conflicts[0]
+    with pytest.raises(RenameConflictError):
+        plan_renames(folder, [('a.png', 'taken.png')])
+    with pytest.raises(RenameConflictError):
+        plan_renames(folder, [('a.png', os.path.join('..', 'a.png'))])
+    with pytest.raises(ValueError):
+        build_renames(['a.png'], 'sub/x', '', 4)
+    assert _contents(folder) == {name: name for name in ['a.png', 'b.png', 'taken.png']}
+
+
+def _batch():
+    # A chain of four renames (checked for a stop before every step) and three pairs
+    # swapping names (cycles, checked only before they start)
+    names = [f'c{i}.png' for i in range(4)] + [f's{i}.png' for i in range(6)]
+    renames = [(f'c{i}.png', f'c{i + 1}.png') for i in range(4)]
+    for first, second in zip(names[4::2], names[5::2]):
+        renames += [(first, second), (second, first)]
+    return names, renames
+
+
+@pytest.mark.parametrize('stop_after', [0, 2, 4, 5])
+def test_resume_finishes_an_interrupted_batch(tmp_path, stop_after):
+    folder = str(tmp_path)
+    names, renames = _batch()
+    _files(folder, names)
+    _run(folder, renames, stop_after=stop_after)
+    journal = pending_journal(folder)
+    assert journal is not None
+    assert not any('.renametmp-' in name for name in os.listdir(folder))
+
+    resume(journal)
+    assert pending_journal(folder) is None
+    assert _contents(folder) == {new: old for old, new in renames}
+
+
+@pytest.mark.parametrize('stop_after', [1, 2, 4, 5])
+def test_undo_restores_an_interrupted_batch(tmp_path, stop_after):
+    folder = str(tmp_path)
+    names, renames = _batch()
+    _files(folder, names)
+    _run(folder, renames, stop_after=stop_after)
+    undo(pending_journal(folder))
+    assert undoable_journal(folder) is None
+    assert _contents(folder) == {name: name for name in names}
+
+
+def test_rename_made_just_before_a_crash_is_not_repeated(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['a.png', 'b.png'])
+    renames = [('a.png', 'x.png'), ('b.png', 'y.png')]
+    plan = _run(folder, renames, stop_after=1)
+    # The crash came after the second rename but before the journal recorded it
+    old, new = plan.steps[1]
+    os.rename(os.path.join(folder, old), os.path.join(folder, new))
+
+    resume(pending_journal(folder))
+    assert _contents(folder) == {'x.png': 'a.png', 'y.png': 'b.png'}
+    undo(undoable_journal(folder))
+    assert _contents(folder) == {'a.png': 'a.png', 'b.png': 'b.png'}
+
+
+def test_undo_never_replaces_a_file_that_appeared_later(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['f1.png', 'f2.png'])
+    _run(folder, [('f1.png', 'shot_1.png'), ('f2.png', 'shot_2.png')])
+    with open(os.path.join(folder, 'f1.png'), 'w') as file:
+        file.write('new render')
+
+    with pytest.raises(FileExistsError):
+        undo(undoable_journal(folder))
+    assert _contents(folder)['f1.png'] == 'new render'
+    # The half-finished undo stays pending until the name is free again
+    journal = pending_journal(folder)
+    assert journal is not None
+    os.rename(os.path.join(folder, 'f1.png'), os.path.join(folder, 'render.png'))
+    undo(journal)
+    assert _contents(folder) == {'f1.png': 'f1.png', 'f2.png': 'f2.png', 'render.png': 'new render'}
+
+
+def test_torn_journal_line_is_ignored(tmp_path):
+    folder = str(tmp_path)
+    _files(folder, ['a.png', 'b.png'])
+    _run(folder, [('a.png', 'x.png'), ('b.png', 'y.png')], stop_after=1)
+    with open(RenameJournal.for_folder(folder).path, 'a') as file:
+        file.write('{"type": "do')
+    resume(pending_journal(folder))
+    assert _contents(folder) == {'x.png': 'a.png', 'y.png': 'b.png'}